@@ -1,4 +1,6 @@
 import logging
+
+import numpy as np
 import slicer
 from slicer.ScriptedLoadableModule import (
     ScriptedLoadableModule,
@@ -8,7 +10,7 @@ from slicer.ScriptedLoadableModule import (
 )
 from slicer.util import VTKObservationMixin
 
-from SlicerLiteLib import SlicerLiteModuleWidget
+from SlicerLiteLib import Model, SlicerLiteModuleWidget
 
 
 #
@@ -58,3 +60,124 @@ class SlicerLiteWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
         self.ui = SlicerLiteModuleWidget()
         self.layout.addWidget(self.ui)
+
+    def cleanup(self):
+        """
+        Called when the application closes and the module widget is destroyed.
+        """
+        self.ui.cleanup()
+
+
+#
+# SlicerLiteTest
+#
+
+class SlicerLiteTest(ScriptedLoadableModuleTest):
+    """
+    This is the test case for your scripted module.
+    Uses ScriptedLoadableModuleTest base class, available at:
+    https://github.com/Slicer/Slicer/blob/main/Base/Python/slicer/ScriptedLoadableModule.py
+    """
+
+    def setUp(self):
+        """
+        Do whatever is needed to reset the state - typically a scene clear will be enough.
+        """
+        slicer.mrmlScene.Clear()
+
+    def runTest(self):
+        """
+        Run as few or as many tests as needed here.
+        """
+        self.setUp()
+        self.test_VolumeItemModelIndexedLookup()
+        self.setUp()
+        self.test_VolumeItemReleaseCycles()
+
+    def test_VolumeItemModelIndexedLookup(self):
+        """
+        Check the item and series UID lookups of a model holding 1000 rows, before and after row removals
+        """
+        nbItems = 1000
+        model = Model.VolumeItemModel()
+        items = [Model.VolumeItem(Model.VolumeHierarchy("patient", "study", f"series{i}", "", f"Series {i}"), 1)
+                 for i in range(nbItems)]
+        for item in items:
+            model.addItem(item)
+        fileItem = Model.VolumeItem(Model.VolumeHierarchy("", "", "", "", "", "volume.nrrd"), 0, volumeName="volume")
+        model.addItem(fileItem)
+
+        for row, item in enumerate(items):
+            self.assertEqual(model.getVolumeIdFromVolumeItem(item), row)
+            self.assertIs(model.getVolumeItemFromSeriesUID(item.volumeHierarchy.seriesUID), item)
+        self.assertEqual(model.getVolumeIdFromVolumeItem(fileItem), nbItems)
+        self.assertEqual(model.getVolumeIdFromVolumeItem(None), -1)
+        self.assertEqual(model.getVolumeIdFromSeriesUID(""), -1)
+
+        model.setCurrentVolumeId(nbItems)
+        self.assertEqual(model.getCurrentVolumeId(), nbItems)
+
+        # Rows after the removed ones are shifted, the removed items are not found anymore
+        model.removeRow(0)
+        model.removeRows(10, 5)
+        removedItems = [items[0]] + items[11:16]
+        remainingItems = items[1:11] + items[16:]
+        for item in removedItems:
+            self.assertEqual(model.getVolumeIdFromVolumeItem(item), -1)
+            self.assertIsNone(model.getVolumeItemFromSeriesUID(item.volumeHierarchy.seriesUID))
+        for row, item in enumerate(remainingItems):
+            self.assertEqual(model.getVolumeIdFromVolumeItem(item), row)
+            self.assertEqual(model.getVolumeIdFromSeriesUID(item.volumeHierarchy.seriesUID), row)
+        self.assertEqual(model.getVolumeIdFromVolumeItem(fileItem), len(remainingItems))
+        self.assertEqual(model.getCurrentVolumeId(), len(remainingItems))
+        self.assertEqual(model.rowCount(), len(remainingItems) + 1)
+
+        # Items added after removals follow the remaining ones
+        addedItem = Model.VolumeItem(Model.VolumeHierarchy("patient", "study", "added", "", "Added"), 1)
+        model.addItem(addedItem)
+        self.assertEqual(model.getVolumeIdFromSeriesUID("added"), len(remainingItems) + 1)
+        model.removeRow(len(remainingItems))
+        self.assertEqual(model.getVolumeIdFromVolumeItem(addedItem), len(remainingItems))
+
+        model.clear()
+        self.assertEqual(model.getVolumeIdFromVolumeItem(remainingItems[0]), -1)
+
+    def test_VolumeItemReleaseCycles(self):
+        """
+        Check that deleting items removes all their nodes and reports their freed pixel data, so that the scene does not
+        grow across repeated load and delete cycles
+        """
+        widget = SlicerLiteModuleWidget()
+        model = widget.itemTableModel
+        nbNodesAfterCycles = []
+        for cycle in range(5):
+            volumeNode = slicer.util.addVolumeFromArray(np.full((32, 32, 32), cycle, dtype=np.int16),
+                                                        name=f"cycle{cycle}")
+            hierarchy = Model.VolumeHierarchy("", "", "", "", "", f"cycle{cycle}.nrrd")
+            volumeItem = widget.addVolumeItem(hierarchy, volumeNode)
+            widget.setCurrentVolumeItem(volumeItem)
+            widget.setCurrentSelectedLineOnTableView(0)
+            volumeItem.getOrCreateSegmentationNode()
+            # The shared preset is only detached before the first rendering change of the current item
+            self.assertIsNone(volumeItem.ownRenderingPropertyNode)
+            widget.detachCurrentRenderingPreset()
+            self.assertIsNotNone(volumeItem.ownRenderingPropertyNode)
+
+            widget.deleteButtonItemDelegate.onButtonClicked(model, model.index(0, 1))
+            self.assertEqual(model.rowCount(), 0)
+            self.assertFalse(volumeItem.isLoaded())
+            self.assertIsNone(volumeItem.segmentationNode)
+            self.assertIsNone(volumeItem.ownRenderingPropertyNode)
+            self.assertFalse(slicer.mrmlScene.IsNodePresent(volumeNode))
+            nbNodesAfterCycles.append(slicer.mrmlScene.GetNumberOfNodes())
+
+        # The first cycle creates the shared rendering preset and the rendering module nodes
+        self.assertEqual(len(set(nbNodesAfterCycles[1:])), 1)
+
+        volumeNode = slicer.util.addVolumeFromArray(np.zeros((16, 16, 16), dtype=np.int16), name="released")
+        volumeItem = widget.addVolumeItem(Model.VolumeHierarchy("", "", "", "", "", "released.nrrd"), volumeNode)
+        model.clear()
+        # Memory sizes are reported by VTK in kibibytes, rounded up
+        self.assertGreaterEqual(widget.releaseVolumeItem(volumeItem), 16 * 16 * 16 * 2)
+        self.assertEqual(volumeItem.release(), 0)
+        widget.cleanup()
@@ -0,0 +1,509 @@
+"""
+Benchmarks of the SlicerLite hot paths.
+
+Run them from the Slicer python console or with Slicer --no-main-window --python-script:
+    from SlicerLiteLib import Benchmarks
+    Benchmarks.benchmarkSequentialDirectoryDrops()
+
+The whole load and switch suite runs headless and writes its results as JSON:
+    Slicer --no-main-window --python-script SlicerLiteLib/Benchmarks.py --output results.json
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+import slicer
+import vtk
+
+from SlicerLiteLib import DataLoader, DicomFileScan, Model, RenderingPresetRegistry, SlicerLiteModuleWidget, \
+    SlicerLiteSettings, clearSeriesMetadataCache, iterateDirectoryFiles, showDicomSeriesMetadata
+
+
+class FakeDicomDatabase:
+    """
+    In memory stand-in of the ctkDICOMDatabase query API used by the DataLoader series discovery
+    """
+
+    def __init__(self):
+        self._studiesForPatient = {}
+        self._seriesForStudy = {}
+        self._studyForSeries = {}
+        self._patientForStudy = {}
+        self._descriptionForSeries = {}
+
+    def addSeries(self, patientUID, studyUID, seriesUID, description):
+        self._studiesForPatient.setdefault(patientUID, [])
+        if studyUID not in self._patientForStudy:
+            self._studiesForPatient[patientUID].append(studyUID)
+            self._patientForStudy[studyUID] = patientUID
+        self._seriesForStudy.setdefault(studyUID, []).append(seriesUID)
+        self._studyForSeries[seriesUID] = studyUID
+        self._descriptionForSeries[seriesUID] = description
+
+    def patients(self):
+        return list(self._studiesForPatient)
+
+    def studiesForPatient(self, patientUID):
+        return self._studiesForPatient[patientUID]
+
+    def seriesForStudy(self, studyUID):
+        return self._seriesForStudy[studyUID]
+
+    def studyForSeries(self, seriesUID):
+        return self._studyForSeries[seriesUID]
+
+    def patientForStudy(self, studyUID):
+        return self._patientForStudy[studyUID]
+
+    def descriptionForSeries(self, seriesUID):
+        return self._descriptionForSeries[seriesUID]
+
+    def filesForSeries(self, seriesUID, hits=-1):
+        return []
+
+
+def _fullDatabaseWalk(db, loadedVolumeHierarchy):
+    """
+    Reference discovery walking the whole database with a linear duplicate check
+    """
+    notLoadedSeries = []
+    for patientUID in db.patients():
+        for studyUID in db.studiesForPatient(patientUID):
+            for seriesUID in db.seriesForStudy(studyUID):
+                description = db.descriptionForSeries(seriesUID)
+                key = (patientUID, studyUID, seriesUID, description)
+                if not any(hierarchy.getKey() == key for hierarchy in loadedVolumeHierarchy):
+                    notLoadedSeries.append(key)
+    return notLoadedSeries
+
+
+def benchmarkSequentialDirectoryDrops(nbDrops=50, nbStudiesPerDrop=2, nbSeriesPerStudy=10):
+    """
+    Simulate nbDrops sequential directory drops, each adding one patient with new studies and series, and time the
+    series discovery of each drop. The full database walk used before the scoped discovery is timed as reference.
+
+    :returns dict with the per drop timings in seconds of the scoped discovery and of the full walk
+    """
+    db = FakeDicomDatabase()
+    dataLoader = DataLoader()
+    loadedVolumeHierarchy = []
+    results = {"scopedDiscovery": [], "fullWalk": []}
+
+    for iDrop in range(nbDrops):
+        addedSeriesUIDs = []
+        patientUID = f"patient{iDrop}"
+        for iStudy in range(nbStudiesPerDrop):
+            studyUID = f"{patientUID}.study{iStudy}"
+            for iSeries in range(nbSeriesPerStudy):
+                seriesUID = f"{studyUID}.series{iSeries}"
+                db.addSeries(patientUID, studyUID, seriesUID, f"Series {iSeries}")
+                addedSeriesUIDs.append(seriesUID)
+
+        start = time.perf_counter()
+        _fullDatabaseWalk(db, loadedVolumeHierarchy)
+        results["fullWalk"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        importedSeriesUIDs = dataLoader.getImportedSeriesUIDs(db, "", addedSeriesUIDs)
+        for patientUID, studyUID, seriesUID, description in dataLoader.findNotLoadedSeries(db, importedSeriesUIDs):
+            hierarchy = Model.VolumeHierarchy(patientUID, studyUID, seriesUID, "", description)
+            dataLoader.registerLoadedVolumeHierarchy(hierarchy)
+            loadedVolumeHierarchy.append(hierarchy)
+        results["scopedDiscovery"].append(time.perf_counter() - start)
+
+    for name, timings in results.items():
+        logging.info(f"{name}: first drop {timings[0] * 1e3:.3f} ms, last drop {timings[-1] * 1e3:.3f} ms, "
+                     f"total {sum(timings) * 1e3:.3f} ms")
+    return results
+
+
+def _legacyRenderingSetup(volumeNode):
+    """
+    Reference rendering setup building the CT bone preset for each volume
+    """
+    volRenLogic = slicer.modules.volumerendering.logic()
+    displayNode = volRenLogic.CreateDefaultVolumeRenderingNodes(volumeNode)
+    renderingPreset = volRenLogic.GetPresetByName("CT-Cropped-Volume-Bone")
+    piecewiseFunction = vtk.vtkPiecewiseFunction()
+    renderingPreset.GetPiecewiseFunctionFromString(RenderingPresetRegistry.Presets["CT-Bone"].scalarOpacity,
+                                                   piecewiseFunction)
+    renderingPreset.SetScalarOpacity(piecewiseFunction)
+    displayNode.GetVolumePropertyNode().Copy(renderingPreset)
+    return displayNode
+
+
+def benchmarkRenderingSetup(nbItems=50):
+    """
+    Time the per item volume rendering setup of nbItems small volumes, with the shared presets of the
+    RenderingPresetRegistry and with the previous per item preset rebuild as reference.
+
+    :returns dict with the per item timings in seconds of the shared preset and of the legacy setups
+    """
+    results = {"sharedPreset": [], "legacyPreset": []}
+    for iItem in range(nbItems):
+        for name in results:
+            volumeNode = slicer.util.addVolumeFromArray(np.zeros((8, 8, 8), dtype=np.int16), name=f"{name}{iItem}")
+            item = Model.VolumeItem(Model.VolumeHierarchy("", "", "", "", ""), 0)
+            item.volumeNode = volumeNode
+
+            start = time.perf_counter()
+            displayNode = item.initializeRendering() if name == "sharedPreset" else _legacyRenderingSetup(volumeNode)
+            results[name].append(time.perf_counter() - start)
+
+            if name == "legacyPreset":
+                slicer.mrmlScene.RemoveNode(displayNode.GetVolumePropertyNode())
+            slicer.mrmlScene.RemoveNode(displayNode)
+            item.volumeNode = None
+            slicer.mrmlScene.RemoveNode(volumeNode)
+
+    for name, timings in results.items():
+        logging.info(f"{name}: mean {np.mean(timings) * 1e3:.3f} ms, total {sum(timings) * 1e3:.3f} ms per item")
+    return results
+
+
+def _disposeWidget(widget):
+    widget.cleanup()
+    widget.deleteLater()
+    slicer.app.processEvents()
+
+
+def benchmarkVolumeSwitch(itemCounts=(10, 50, 100), nbSwitches=20):
+    """
+    Time the switch of the current volume in a SlicerLiteModuleWidget holding an increasing number of small loaded
+    volumes, including the render of the views. The switch latency should not depend on the number of items.
+
+    :returns dict with the switch timings in seconds for each item count
+    """
+    results = {}
+    for nbItems in itemCounts:
+        widget = SlicerLiteModuleWidget()
+        for iItem in range(nbItems):
+            volumeNode = slicer.util.addVolumeFromArray(np.full((8, 8, 8), iItem, dtype=np.int16),
+                                                        name=f"switch{iItem}")
+            widget.addVolumeItem(Model.VolumeHierarchy("", "", "", "", ""), volumeNode)
+        slicer.app.processEvents()
+
+        timings = []
+        for iSwitch in range(nbSwitches):
+            volumeItem = widget.itemTableModel.getVolumeItemFromId(iSwitch % nbItems)
+            start = time.perf_counter()
+            widget.setCurrentVolumeItem(volumeItem)
+            slicer.app.processEvents()
+            timings.append(time.perf_counter() - start)
+        results[nbItems] = timings
+
+        _disposeWidget(widget)
+
+    for nbItems, timings in results.items():
+        logging.info(f"{nbItems} items: median switch {np.median(timings) * 1e3:.3f} ms")
+    return results
+
+
+def _writeSyntheticDicomFile(filePath, sopClassUID):
+    """
+    Write a file with a DICOM preamble and file meta information, without dataset
+    """
+    def uidElement(element, uid):
+        value = uid.encode() + (b"\0" if len(uid) % 2 else b"")
+        return struct.pack("<HH", 0x0002, element) + b"UI" + struct.pack("<H", len(value)) + value
+
+    elements = struct.pack("<HH", 0x0002, 0x0001) + b"OB\0\0" + struct.pack("<I", 2) + b"\0\1"
+    elements += uidElement(0x0002, sopClassUID) + uidElement(0x0003, "1.2.826.0.1.3680043.2.1125.1")
+    groupLength = struct.pack("<HH", 0x0002, 0x0000) + b"UL" + struct.pack("<HI", 4, len(elements))
+    with open(filePath, "wb") as dicomFile:
+        dicomFile.write(b"\0" * 128 + b"DICM" + groupLength + elements + b"\0" * 512)
+
+
+def createSyntheticMixedTree(rootDirectory, nbFiles=100000, nbFilesPerDirectory=500):
+    """
+    Create a tree of nbFiles files of which one out of five is a CT image instance. The other files are structured
+    reports, JPEG thumbnails, text reports and files without extension nor DICOM header.
+
+    :returns the number of CT image instances
+    """
+    ctImageStorage = "1.2.840.10008.5.1.4.1.1.2"
+    basicTextSr = "1.2.840.10008.5.1.4.1.1.88.11"
+    nbImages = 0
+    for iFile in range(nbFiles):
+        directoryPath = os.path.join(rootDirectory, f"dir{iFile // nbFilesPerDirectory:04d}")
+        if iFile % nbFilesPerDirectory == 0:
+            os.makedirs(directoryPath, exist_ok=True)
+        kind = iFile % 5
+        if kind == 0:
+            _writeSyntheticDicomFile(os.path.join(directoryPath, f"IM{iFile:06d}"), ctImageStorage)
+            nbImages += 1
+        elif kind == 1:
+            _writeSyntheticDicomFile(os.path.join(directoryPath, f"SR{iFile:06d}.dcm"), basicTextSr)
+        elif kind == 2:
+            with open(os.path.join(directoryPath, f"thumbnail{iFile:06d}.jpg"), "wb") as imageFile:
+                imageFile.write(b"\xff\xd8\xff\xe0" + b"\0" * 1024)
+        elif kind == 3:
+            with open(os.path.join(directoryPath, f"report{iFile:06d}.txt"), "w") as textFile:
+                textFile.write("Report\n" * 64)
+        else:
+            with open(os.path.join(directoryPath, f"unknown{iFile:06d}"), "wb") as unknownFile:
+                unknownFile.write(b"\1" * 2048)
+    return nbImages
+
+
+def benchmarkDirectoryScan(nbFiles=100000, rootDirectory=None):
+    """
+    Time the streaming DICOM file scan of a synthetic mixed tree of nbFiles files: delay until the first batch of files
+    is available for indexing, total scan time and number of files handed to the indexer compared to the whole tree.
+
+    :returns dict with the timings in seconds and the file counts
+    """
+    with tempfile.TemporaryDirectory() as temporaryDirectory:
+        rootDirectory = rootDirectory or temporaryDirectory
+        nbImages = createSyntheticMixedTree(rootDirectory, nbFiles)
+
+        start = time.perf_counter()
+        fileScan = DicomFileScan(iterateDirectoryFiles(rootDirectory))
+        fileScan.start()
+        firstBatchTime = None
+        nbFoundFiles = 0
+        for batch in fileScan.iterateBatches():
+            if firstBatchTime is None:
+                firstBatchTime = time.perf_counter() - start
+            nbFoundFiles += len(batch)
+        results = {
+            "firstBatch": firstBatchTime,
+            "totalScan": time.perf_counter() - start,
+            "nbTreeFiles": fileScan.nbScannedFiles,
+            "nbFoundFiles": nbFoundFiles,
+            "nbImageFiles": nbImages,
+        }
+
+    logging.info(f"First batch after {results['firstBatch'] * 1e3:.1f} ms, scan of {results['nbTreeFiles']} files in "
+                 f"{results['totalScan']:.2f} s, {results['nbFoundFiles']} files to index "
+                 f"({results['nbImageFiles']} images)")
+    return results
+
+
+def benchmarkStartup(nbRuns=5):
+    """
+    Time the creation of the SlicerLiteModuleWidget, done when Slicer starts in the SlicerLite module, and the deferred
+    creation of its volume rendering slider and segment editor panels.
+
+    :returns dict with the per run timings in seconds of the widget and of the deferred panels creations
+    """
+    results = {"createWidget": [], "setupRenderingModule": [], "setupSegmentEditor": []}
+    for iRun in range(nbRuns):
+        start = time.perf_counter()
+        widget = SlicerLiteModuleWidget()
+        slicer.app.processEvents()
+        results["createWidget"].append(time.perf_counter() - start)
+
+        for step in ("setupRenderingModule", "setupSegmentEditor"):
+            start = time.perf_counter()
+            getattr(widget, step)()
+            slicer.app.processEvents()
+            results[step].append(time.perf_counter() - start)
+
+        _disposeWidget(widget)
+
+    for name, timings in results.items():
+        logging.info(f"{name}: median {np.median(timings) * 1e3:.1f} ms")
+    return results
+
+
+def writeSyntheticDicomSeries(directoryPath, shape, seriesIndex=0):
+    """
+    Write a CT series of shape (slices, rows, columns) with reproducible random voxels, one DICOM file per slice
+    """
+    import SimpleITK as sitk
+
+    os.makedirs(directoryPath, exist_ok=True)
+    uidRoot = "1.2.826.0.1.3680043.2.1125.9"
+    seriesUID = f"{uidRoot}.{seriesIndex + 1}.{'.'.join(str(dimension) for dimension in shape)}"
+    image = sitk.GetImageFromArray(np.random.default_rng(seriesIndex).integers(-1000, 2000, shape, dtype=np.int16))
+    image.SetSpacing((0.8, 0.8, 1.5))
+    commonTags = {
+        "0008|0016": "1.2.840.10008.5.1.4.1.1.2",
+        "0008|0060": "CT",
+        "0008|103e": f"Synthetic series {seriesIndex + 1}",
+        "0010|0010": "SlicerLite^Benchmark",
+        "0010|0020": "SlicerLiteBenchmark",
+        "0018|0050": "1.5",
+        "0020|000d": f"{uidRoot}.0",
+        "0020|000e": seriesUID,
+        "0020|0037": "1\\0\\0\\0\\1\\0",
+        "0028|1052": "0",
+        "0028|1053": "1",
+    }
+
+    writer = sitk.ImageFileWriter()
+    writer.KeepOriginalImageUIDOn()
+    for iSlice in range(shape[0]):
+        sliceImage = image[:, :, iSlice]
+        for tag, value in commonTags.items():
+            sliceImage.SetMetaData(tag, value)
+        position = image.TransformIndexToPhysicalPoint((0, 0, iSlice))
+        sliceImage.SetMetaData("0020|0032", "\\".join(str(coordinate) for coordinate in position))
+        sliceImage.SetMetaData("0020|0013", str(iSlice + 1))
+        sliceImage.SetMetaData("0008|0018", f"{seriesUID}.{iSlice + 1}")
+        writer.SetFileName(os.path.join(directoryPath, f"IM{iSlice + 1:04d}.dcm"))
+        writer.Execute(sliceImage)
+    return seriesUID
+
+
+def writeSyntheticNiftiVolume(filePath, shape, volumeIndex=0):
+    """
+    Write a volume of shape (slices, rows, columns) with reproducible random voxels
+    """
+    import SimpleITK as sitk
+
+    array = np.random.default_rng(1000 + volumeIndex).integers(0, 1000, shape, dtype=np.int16)
+    image = sitk.GetImageFromArray(array)
+    image.SetSpacing((1.0, 1.0, 1.0))
+    sitk.WriteImage(image, filePath)
+
+
+def _waitUntil(predicate, timeoutSeconds):
+    """
+    Process the Qt events, polling the background jobs, until the predicate is true
+    """
+    start = time.perf_counter()
+    while not predicate():
+        if time.perf_counter() - start > timeoutSeconds:
+            raise TimeoutError(f"Benchmark step not finished after {timeoutSeconds} s")
+        slicer.app.processEvents()
+        time.sleep(0.001)
+
+
+def _summarize(timings):
+    return {
+        "timings": timings,
+        "median": float(np.median(timings)) if timings else None,
+        "min": min(timings) if timings else None,
+        "max": max(timings) if timings else None,
+    }
+
+
+def runBenchmarkSuite(outputPath=None, volumeShape=(64, 256, 256), nbDicomSeries=3, nbNiftiVolumes=3, nbSwitches=20,
+                      nbRepeats=3, timeoutSeconds=600):
+    """
+    Time the SlicerLite hot paths on synthetic DICOM series and NIfTI volumes of volumeShape (slices, rows, columns):
+    load of the DICOM directory and of each NIfTI file with loadInputData, switch of the current item, display of
+    the DICOM metadata (first and cached open) and deletion of the items. Each step is repeated nbRepeats times in a
+    new SlicerLiteModuleWidget, the synthetic data being written once.
+
+    The loading settings are reported with the results, as they change the measured paths: the DICOM index and
+    decoded volume caches are warm after the first repeat when they are enabled.
+
+    :returns dict of the results, also written as JSON to outputPath if given
+    """
+    isLoaded = lambda widget: widget.loadJob is None or not widget.loadJob.isRunning()
+    isSwitched = lambda widget: widget.pendingCurrentVolumeItem is None and not widget.progressiveLoads
+    timings = {step: [] for step in ("createWidget", "loadDicomDirectory", "loadNiftiVolume", "switchVolume",
+                                     "openMetadata", "reopenMetadata", "deleteVolume")}
+
+    with tempfile.TemporaryDirectory() as dataDirectory:
+        dicomDirectory = os.path.join(dataDirectory, "dicom")
+        for iSeries in range(nbDicomSeries):
+            writeSyntheticDicomSeries(os.path.join(dicomDirectory, f"series{iSeries}"), volumeShape, iSeries)
+        niftiPaths = [os.path.join(dataDirectory, f"volume{iVolume}.nii.gz") for iVolume in range(nbNiftiVolumes)]
+        for iVolume, niftiPath in enumerate(niftiPaths):
+            writeSyntheticNiftiVolume(niftiPath, volumeShape, iVolume)
+
+        for iRepeat in range(nbRepeats):
+            slicer.mrmlScene.Clear()
+            start = time.perf_counter()
+            widget = SlicerLiteModuleWidget()
+            slicer.app.processEvents()
+            timings["createWidget"].append(time.perf_counter() - start)
+            model = widget.itemTableModel
+
+            start = time.perf_counter()
+            widget.loadInputData(dicomDirectory)
+            _waitUntil(lambda: isLoaded(widget), timeoutSeconds)
+            timings["loadDicomDirectory"].append(time.perf_counter() - start)
+
+            for niftiPath in niftiPaths:
+                start = time.perf_counter()
+                widget.loadInputData(niftiPath)
+                _waitUntil(lambda: isLoaded(widget), timeoutSeconds)
+                timings["loadNiftiVolume"].append(time.perf_counter() - start)
+
+            # Lazily listed series are loaded at their first switch, included in the timings
+            for iSwitch in range(nbSwitches if model.rowCount() else 0):
+                volumeItem = model.getVolumeItemFromId(iSwitch % model.rowCount())
+                start = time.perf_counter()
+                widget.setCurrentVolumeItem(volumeItem)
+                _waitUntil(lambda: isSwitched(widget), timeoutSeconds)
+                slicer.app.processEvents()
+                timings["switchVolume"].append(time.perf_counter() - start)
+
+            dicomItems = [model.getVolumeItemFromId(row) for row in range(model.rowCount())
+                          if model.getVolumeItemFromId(row).isDicomVolumeItem()]
+            for volumeItem in dicomItems:
+                # Drop the tags read by the previous repeat, the first open then reads the series again
+                clearSeriesMetadataCache()
+                for step in ("openMetadata", "reopenMetadata"):
+                    start = time.perf_counter()
+                    dialog = showDicomSeriesMetadata(volumeItem.volumeHierarchy.seriesUID, volumeItem.volumeName)
+                    _waitUntil(lambda: dialog.seriesMetadata.isComplete, timeoutSeconds)
+                    dialog.refresh()
+                    timings[step].append(time.perf_counter() - start)
+                    dialog.close()
+
+            while model.rowCount():
+                start = time.perf_counter()
+                widget.deleteButtonItemDelegate.onButtonClicked(model, model.index(0, 1))
+                slicer.app.processEvents()
+                timings["deleteVolume"].append(time.perf_counter() - start)
+
+            _disposeWidget(widget)
+
+    results = {
+        "parameters": {
+            "volumeShape": list(volumeShape),
+            "nbDicomSeries": nbDicomSeries,
+            "nbNiftiVolumes": nbNiftiVolumes,
+            "nbSwitches": nbSwitches,
+            "nbRepeats": nbRepeats,
+        },
+        "settings": {name: getattr(SlicerLiteSettings, name) for name in (
+            "AsynchronousLoading", "LazySeriesLoading", "ProgressiveLoading", "PersistentDicomIndex",
+            "DecodedVolumeCacheQuotaMB")},
+        "slicerVersion": slicer.app.applicationVersion,
+        "steps": {step: _summarize(stepTimings) for step, stepTimings in timings.items()},
+    }
+    for step, summary in results["steps"].items():
+        if summary["median"] is not None:
+            logging.info(f"{step}: median {summary['median'] * 1e3:.1f} ms over {len(summary['timings'])} runs")
+    if outputPath:
+        with open(outputPath, "w") as outputFile:
+            json.dump(results, outputFile, indent=2)
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run the SlicerLite benchmark suite")
+    parser.add_argument("--output", default="SlicerLiteBenchmarks.json", help="JSON file of the results")
+    parser.add_argument("--shape", type=int, nargs=3, default=(64, 256, 256), metavar=("SLICES", "ROWS", "COLUMNS"),
+                        help="Shape of the synthetic volumes")
+    parser.add_argument("--dicom-series", type=int, default=3, help="Number of synthetic DICOM series")
+    parser.add_argument("--nifti-volumes", type=int, default=3, help="Number of synthetic NIfTI volumes")
+    parser.add_argument("--switches", type=int, default=20, help="Number of current volume switches")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of repeats of the suite")
+    args = parser.parse_args(argv)
+    runBenchmarkSuite(args.output, tuple(args.shape), args.dicom_series, args.nifti_volumes, args.switches,
+                      args.repeats)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    try:
+        main(sys.argv[1:])
+    except Exception:
+        logging.exception("SlicerLite benchmark suite failed")
+        slicer.util.exit(1)
+    else:
+        slicer.util.exit(0)
@@ -1,13 +1,32 @@
+import itertools
+import logging
+import os
+import queue
+import re
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List
 
+import ctk
+import qt
 import slicer
 from DICOMLib import DICOMUtils
-from SlicerLiteLib import Model, SlicerUtils
+from SlicerLiteLib import Model, SlicerUtils, Utils, SlicerLiteSettings, DicomIndexCache, DecodedVolumeCache, \
+    VolumeData, getForegroundBox, getPipelineProfiler, getVolumeIdentifier
+
+_decodedVolumeCache = None
 
 
 def loadVolume(filePath):
-    volume = slicer.util.loadVolume(filePath)
-    return Model.VolumeHierarchy("", "", "", "", ""), volume
+    """
+    Load a volume file with the same reader as the asynchronous load, so that it gets the same foreground cropping
+    """
+    volumeData = readVolumeFileData(filePath, getDecodedVolumeCache())
+    with getPipelineProfiler().measureStage(filePath, "createVolumeNode"):
+        volume = SlicerUtils.addVolumeNodeFromVolumeData(volumeData, qt.QFileInfo(filePath).completeBaseName())
+    return Model.VolumeHierarchy("", "", "", "", "", filePath), volume
 
 
 def getNumberOfDicomFilesFromVolumeHierarchy(volumeHierarchy):
@@ -17,63 +36,1036 @@ def getNumberOfDicomFilesFromVolumeHierarchy(volumeHierarchy):
     return len(slicer.dicomDatabase.instancesForSeries(volumeHierarchy.seriesUID))
 
 
+def getLoadingWorkerCount():
+    """
+    Return the size of the series reading pool, configured by the LoadingWorkerCount setting
+    """
+    workerCount = SlicerLiteSettings.LoadingWorkerCount
+    return workerCount if workerCount > 0 else (os.cpu_count() or 1)
+
+
+def getDecodedVolumeCache():
+    """
+    Return the cache of decoded volumes, or None if disabled by the DecodedVolumeCacheQuotaMB setting.
+    Must be called from the main thread, the returned cache can then be used by the workers.
+    """
+    global _decodedVolumeCache
+    quotaBytes = int(SlicerLiteSettings.DecodedVolumeCacheQuotaMB * 1024 * 1024)
+    if quotaBytes <= 0:
+        return None
+    if _decodedVolumeCache is None:
+        cacheDirectory = os.path.join(SlicerUtils.getCacheDirectory(), "DecodedVolumes")
+        _decodedVolumeCache = DecodedVolumeCache(cacheDirectory, quotaBytes)
+    _decodedVolumeCache.quotaBytes = quotaBytes
+    return _decodedVolumeCache
+
+
+class LoadCancelledError(Exception):
+    pass
+
+
+class UnsupportedDicomSeriesError(Exception):
+    """
+    Raised when the files of a DICOM series can't be read as a single stack of slices, for instance multi-echo, DWI or
+    multi-frame series. These series are loaded by the DICOM plugins instead.
+    """
+    pass
+
+
+# Tolerance in mm on the slice positions and on the orientation cosines
+DicomGeometryTolerance = 1e-3
+# Relative tolerance on the spacing of the slices of a proxy read from a subset of the files
+DicomProxySpacingTolerance = 0.01
+
+
+def _getDicomSliceGeometry(fileReader):
+    """
+    Return the orientation of the slice and its position along its normal, or None if the geometry tags are missing
+    """
+    try:
+        position = [float(v) for v in fileReader.GetMetaData("0020|0032").split("\\")]
+        orientation = [float(v) for v in fileReader.GetMetaData("0020|0037").split("\\")]
+    except (RuntimeError, ValueError):
+        return None
+    row, column = orientation[:3], orientation[3:]
+    normal = [row[1] * column[2] - row[2] * column[1],
+              row[2] * column[0] - row[0] * column[2],
+              row[0] * column[1] - row[1] * column[0]]
+    return orientation, sum(p * n for p, n in zip(position, normal))
+
+
+def _getDicomNumberOfFrames(fileReader):
+    try:
+        return int(fileReader.GetMetaData("0028|0008"))
+    except (RuntimeError, ValueError):
+        return 1
+
+
+def _checkDicomSliceGeometries(filePaths, geometries, numbersOfFrames):
+    """
+    Raise UnsupportedDicomSeriesError if the slices don't make a single stack: multi-frame files, different
+    orientations, missing geometry on part of the slices or several slices at the same position
+    """
+    if len(filePaths) < 2:
+        return
+    if any(nbFrames > 1 for nbFrames in numbersOfFrames):
+        raise UnsupportedDicomSeriesError("Series of multi-frame files")
+    locatedGeometries = [geometry for geometry in geometries if geometry is not None]
+    if not locatedGeometries:
+        return
+    if len(locatedGeometries) != len(geometries):
+        raise UnsupportedDicomSeriesError("Slices without position in the series")
+    orientation = locatedGeometries[0][0]
+    if any(max(abs(a - b) for a, b in zip(orientation, o)) > DicomGeometryTolerance for o, _ in locatedGeometries):
+        raise UnsupportedDicomSeriesError("Slices with different orientations in the series")
+    positions = sorted(position for _, position in locatedGeometries)
+    if any(b - a < DicomGeometryTolerance for a, b in zip(positions, positions[1:])):
+        raise UnsupportedDicomSeriesError("Several slices at the same position in the series")
+
+
+def _readDicomSliceGeometries(filePaths, cancelEvent=None):
+    """
+    Return the slice geometries and numbers of frames of the DICOM files, reading only their headers
+    """
+    import SimpleITK as sitk
+
+    geometries = []
+    numbersOfFrames = []
+    for filePath in filePaths:
+        if cancelEvent is not None and cancelEvent.is_set():
+            raise LoadCancelledError()
+        reader = sitk.ImageFileReader()
+        reader.SetFileName(filePath)
+        reader.LoadPrivateTagsOff()
+        try:
+            reader.ReadImageInformation()
+            geometry = _getDicomSliceGeometry(reader)
+            nbFrames = _getDicomNumberOfFrames(reader)
+        except RuntimeError:
+            geometry, nbFrames = None, 1
+        geometries.append(geometry)
+        numbersOfFrames.append(nbFrames)
+    return geometries, numbersOfFrames
+
+
+def sortDicomFiles(filePaths, cancelEvent=None):
+    """
+    Sort the DICOM files of a series along the slice normal, reading only the file headers.
+    Files without geometry information keep their relative order.
+    Raise UnsupportedDicomSeriesError if the files are not a single stack of slices.
+    """
+    geometries, numbersOfFrames = _readDicomSliceGeometries(filePaths, cancelEvent)
+    _checkDicomSliceGeometries(filePaths, geometries, numbersOfFrames)
+    if None in geometries:
+        return list(filePaths)
+    return [f for _, f in sorted(zip((position for _, position in geometries), filePaths))]
+
+
+def _getNaturalSortKey(filePath):
+    # Numbers are compared by value so that "IM2" comes before "IM10"
+    return [int(token) if token.isdigit() else token.lower() for token in re.split(r"(\d+)", filePath)]
+
+
+def selectDicomProxyFiles(filePaths, maxProxyDimension, cancelEvent=None):
+    """
+    Return a strided subset of the DICOM files of a series sorted along the slice normal, to read a proxy of at most
+    maxProxyDimension slices. Only the headers of the subset are read: the files are assumed to be named in slice
+    order, which is checked from the positions of the subset slices.
+    Return None if the files are not named in slice order, all the headers must then be read to sort the slices.
+    """
+    sliceStride = -(-len(filePaths) // maxProxyDimension)
+    if sliceStride <= 1:
+        return None
+    subsetFiles = sorted(filePaths, key=_getNaturalSortKey)[::sliceStride]
+    geometries, numbersOfFrames = _readDicomSliceGeometries(subsetFiles, cancelEvent)
+    _checkDicomSliceGeometries(subsetFiles, geometries, numbersOfFrames)
+    if None in geometries or len(subsetFiles) < 2:
+        return None
+
+    # Slices named in order are evenly spaced along the normal, in ascending or descending order
+    positions = [position for _, position in geometries]
+    steps = [b - a for a, b in zip(positions, positions[1:])]
+    meanStep = (positions[-1] - positions[0]) / len(steps)
+    if any(abs(step - meanStep) > DicomProxySpacingTolerance * abs(meanStep) for step in steps):
+        return None
+    return subsetFiles if meanStep > 0 else subsetFiles[::-1]
+
+
+def loadDicomSeriesWithPlugins(seriesUID, volumeName):
+    """
+    Load a DICOM series with the DICOM plugins of Slicer and return its first scalar volume node, or None if no
+    volume could be loaded. The other loaded nodes are removed. Must be called from the main thread.
+    """
+    loadedNodes = [slicer.mrmlScene.GetNodeByID(nodeID) for nodeID in DICOMUtils.loadSeriesByUID([seriesUID])]
+    volumeNodes = [node for node in loadedNodes if node is not None and node.IsA("vtkMRMLScalarVolumeNode")]
+    for node in loadedNodes:
+        if node is not None and (not volumeNodes or node is not volumeNodes[0]):
+            SlicerUtils.removeNodeWithDependencies(node)
+    if not volumeNodes:
+        return None
+    volumeNodes[0].SetName(volumeName)
+    return volumeNodes[0]
+
+
+def readDicomSeries(filePaths, cancelEvent=None, isSorted=False):
+    """
+    Read the pixel data of a DICOM series as a SimpleITK image.
+    Neither the MRML scene nor the DICOM database are accessed so that this can run in a worker thread.
+    """
+    import SimpleITK as sitk
+
+    sortedFiles = filePaths if isSorted else sortDicomFiles(filePaths, cancelEvent)
+    if cancelEvent is not None and cancelEvent.is_set():
+        raise LoadCancelledError()
+    reader = sitk.ImageSeriesReader()
+    reader.SetFileNames(sortedFiles)
+    return reader.Execute()
+
+
+def readVolumeFile(filePath, cancelEvent=None):
+    """
+    Read a volume file (NIfTI, NRRD, MHA...) as a SimpleITK image. Can run in a worker thread.
+    """
+    import SimpleITK as sitk
+
+    if cancelEvent is not None and cancelEvent.is_set():
+        raise LoadCancelledError()
+    return sitk.ReadImage(filePath)
+
+
+def _cropToForeground(identifier, volumeData) -> VolumeData:
+    """
+    Return the volume cropped to its foreground box if enabled in the settings
+    """
+    if not SlicerLiteSettings.ForegroundCropping or not SlicerLiteSettings.ForegroundCropStoredVolumes:
+        return volumeData
+    with getPipelineProfiler().measureStage(identifier, "foregroundCrop"):
+        box = getForegroundBox(volumeData.array, SlicerLiteSettings.ForegroundThresholdFraction)
+        if box is None or box == ((0, 0, 0), volumeData.array.shape[2::-1]):
+            return volumeData
+        return volumeData.getCropped(*box)
+
+
+def _readCachedVolumeData(volumeCache, identifier, filePaths, decode) -> VolumeData:
+    """
+    Return the cached VolumeData if the source files did not change, else decode and cache it.
+    The whole volume is cached, it is then cropped to its foreground if enabled.
+    """
+    profiler = getPipelineProfiler()
+    key = volumeCache.getKey(identifier, filePaths) if volumeCache is not None else None
+    if key:
+        with profiler.measureStage(identifier, "cacheLoad"):
+            volumeData = volumeCache.load(key)
+        if volumeData is not None:
+            profiler.addCounters(identifier, bytesRead=volumeData.array.nbytes, voxelCount=volumeData.getVoxelCount())
+            return _cropToForeground(identifier, volumeData)
+
+    with profiler.measureStage(identifier, "decode"):
+        volumeData = VolumeData.fromImage(decode())
+    if profiler.isEnabled():
+        profiler.addCounters(identifier, bytesRead=sum(os.path.getsize(filePath) for filePath in filePaths),
+                             voxelCount=volumeData.getVoxelCount())
+    if key:
+        try:
+            with profiler.measureStage(identifier, "cacheStore"):
+                volumeCache.store(key, volumeData)
+        except OSError as e:
+            logging.warning(f"Failed to cache decoded volume {identifier}: {e}")
+    return _cropToForeground(identifier, volumeData)
+
+
+def readDicomSeriesData(seriesUID, filePaths, volumeCache=None, cancelEvent=None) -> VolumeData:
+    """
+    Read the voxels of a DICOM series, from the decoded volume cache if available. Can run in a worker thread.
+    """
+    return _readCachedVolumeData(volumeCache, seriesUID, filePaths, lambda: readDicomSeries(filePaths, cancelEvent))
+
+
+def readVolumeFileData(filePath, volumeCache=None, cancelEvent=None) -> VolumeData:
+    """
+    Read the voxels of a volume file, from the decoded volume cache if available. Can run in a worker thread.
+    """
+    return _readCachedVolumeData(volumeCache, filePath, [filePath], lambda: readVolumeFile(filePath, cancelEvent))
+
+
+def readDicomSeriesDataProgressively(seriesUID, filePaths, proxyFuture, maxProxyDimension, volumeCache=None,
+                                     cancelEvent=None) -> VolumeData:
+    """
+    Read the voxels of a DICOM series, first setting a downsampled proxy of the volume as result of proxyFuture.
+    The proxy is read from a strided subset of the slices, unless the volume is in the decoded volume cache. When the
+    files are named in slice order, only the headers of this subset are read before the proxy is set.
+    Can run in a worker thread.
+    """
+    key = volumeCache.getKey(seriesUID, filePaths) if volumeCache is not None else None
+    volumeData = volumeCache.load(key) if key else None
+    if volumeData is not None:
+        # The whole volume is cached, it is cropped as in _readCachedVolumeData
+        volumeData = _cropToForeground(seriesUID, volumeData)
+        proxyFuture.set_result(volumeData.getDownsampled(volumeData.getProxyStrides(maxProxyDimension)))
+        return volumeData
+
+    with getPipelineProfiler().measureStage(seriesUID, "proxyDecode"):
+        sortedFiles = None
+        proxyFiles = selectDicomProxyFiles(filePaths, maxProxyDimension, cancelEvent)
+        if proxyFiles is None:
+            sortedFiles = sortDicomFiles(filePaths, cancelEvent)
+            proxyFiles = sortedFiles[::max(1, -(-len(sortedFiles) // maxProxyDimension))]
+        sliceSubset = VolumeData.fromImage(readDicomSeries(proxyFiles, cancelEvent, isSorted=True))
+        strideI, strideJ, _ = sliceSubset.getProxyStrides(maxProxyDimension)
+    proxyFuture.set_result(sliceSubset.getDownsampled((strideI, strideJ, 1)))
+
+    # The full resolution read sorts all the files, unless already done for the proxy
+    return _readCachedVolumeData(volumeCache, seriesUID, filePaths,
+                                 lambda: readDicomSeries(sortedFiles or filePaths, cancelEvent,
+                                                         isSorted=sortedFiles is not None))
+
+
+def readVolumeFileDataProgressively(filePath, proxyFuture, maxProxyDimension, volumeCache=None,
+                                    cancelEvent=None) -> VolumeData:
+    """
+    Read the voxels of a volume file and set a downsampled proxy as result of proxyFuture.
+    Volume files can't be partially read, the proxy is only available once the whole file is decoded.
+    """
+    volumeData = readVolumeFileData(filePath, volumeCache, cancelEvent)
+    proxyFuture.set_result(volumeData.getDownsampled(volumeData.getProxyStrides(maxProxyDimension)))
+    return volumeData
+
+
+def _readMediaStorageSopClassUID(header: bytes):
+    """
+    Return the SOP class UID of the file meta information of a DICOM file header, or None if not found
+    """
+    # File meta elements are encoded in explicit VR little endian after the preamble and the DICM prefix
+    offset = 132
+    while offset + 8 <= len(header):
+        group, element = struct.unpack_from("<HH", header, offset)
+        if group != 0x0002:
+            return None
+        vr = header[offset + 4:offset + 6]
+        if vr in (b"OB", b"OW", b"OF", b"SQ", b"UT", b"UN"):
+            length = struct.unpack_from("<I", header, offset + 8)[0]
+            valueOffset = offset + 12
+        else:
+            length = struct.unpack_from("<H", header, offset + 6)[0]
+            valueOffset = offset + 8
+        if element == 0x0002:
+            return header[valueOffset:valueOffset + length].rstrip(b"\0 ").decode("ascii", "ignore")
+        offset = valueOffset + length
+    return None
+
+
+def isDicomImageFile(filePath):
+    """
+    Return True if the file may be a DICOM image instance, from its extension and its header only.
+    Files with a DICM prefix are kept unless their SOP class has no pixel data. Files without DICM prefix are only
+    kept if they have a DICOM extension.
+    """
+    extension = os.path.splitext(filePath)[1].lower()
+    if extension in DicomFileScan.NonDicomExtensions:
+        return False
+    try:
+        with open(filePath, "rb") as dicomFile:
+            header = dicomFile.read(DicomFileScan.HeaderSize)
+    except OSError:
+        return False
+
+    if header[128:132] != b"DICM":
+        return extension in DicomFileScan.DicomExtensions
+    sopClassUID = _readMediaStorageSopClassUID(header)
+    return not sopClassUID or not sopClassUID.startswith(DicomFileScan.NonImageSopClassUIDPrefixes)
+
+
+def iterateDirectoryFiles(directoryPath):
+    """
+    Lazily walk the directory tree and yield its files
+    """
+    for root, _, fileNames in os.walk(directoryPath):
+        for fileName in fileNames:
+            yield os.path.join(root, fileName)
+
+
+class DicomFileScan:
+    """
+    Filtering of the DICOM image files in a worker thread, delivering the found files in batches while the scan goes
+    on so that they can be indexed without waiting for its end.
+    """
+    BatchSize = 500
+    HeaderSize = 1024
+    DicomExtensions = (".dcm", ".dicom", ".dic", ".ima")
+    NonDicomExtensions = {
+        ".bmp", ".csv", ".db", ".doc", ".docx", ".exe", ".gif", ".htm", ".html", ".ini", ".jpeg", ".jpg", ".json",
+        ".log", ".mha", ".mhd", ".nii", ".nrrd", ".pdf", ".png", ".py", ".rtf", ".txt", ".xls", ".xlsx", ".xml",
+        ".zip", ".gz",
+    }
+    # SOP classes without pixel data: directory records, presentation states, waveforms, raw data, structured
+    # reports and encapsulated documents
+    NonImageSopClassUIDPrefixes = (
+        "1.2.840.10008.1.3.10",
+        "1.2.840.10008.5.1.4.1.1.11.",
+        "1.2.840.10008.5.1.4.1.1.9.",
+        "1.2.840.10008.5.1.4.1.1.66",
+        "1.2.840.10008.5.1.4.1.1.88.",
+        "1.2.840.10008.5.1.4.1.1.104.",
+    )
+
+    def __init__(self, filePaths):
+        """
+        :param filePaths: iterable of the files to filter, such as iterateDirectoryFiles, consumed by the worker thread
+        """
+        self._batches = queue.Queue()
+        self._isDone = threading.Event()
+        self._cancelEvent = threading.Event()
+        self.nbScannedFiles = 0
+        self.nbFoundFiles = 0
+        self._thread = threading.Thread(target=self._run, args=(filePaths,), daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelEvent.set()
+
+    def _run(self, filePaths):
+        batch = []
+        try:
+            for filePath in filePaths:
+                if self._cancelEvent.is_set():
+                    return
+                self.nbScannedFiles += 1
+                if not isDicomImageFile(filePath):
+                    continue
+                self.nbFoundFiles += 1
+                batch.append(filePath)
+                if len(batch) >= DicomFileScan.BatchSize:
+                    self._batches.put(batch)
+                    batch = []
+            if batch:
+                self._batches.put(batch)
+        finally:
+            self._isDone.set()
+
+    def isDone(self):
+        return self._isDone.is_set()
+
+    def takeBatches(self):
+        """
+        Return the batches of files found since the last call
+        """
+        batches = []
+        while True:
+            try:
+                batches.append(self._batches.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def iterateBatches(self):
+        """
+        Yield the batches of files until the scan is done, blocking while waiting for the next batch
+        """
+        while True:
+            isDone = self.isDone()
+            yield from self.takeBatches()
+            if isDone:
+                return
+            self._isDone.wait(0.01)
+
+
+class SeriesAddedRecorder:
+    """
+    Record the UIDs of the series inserted in a DICOM database between its creation and the call to stop
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.seriesUIDs = {}
+        self.db.connect("seriesAdded(QString)", self._onSeriesAdded)
+
+    def _onSeriesAdded(self, seriesUID):
+        # Dict used as an insertion ordered set
+        self.seriesUIDs[seriesUID] = None
+
+    def stop(self) -> List[str]:
+        self.db.disconnect("seriesAdded(QString)", self._onSeriesAdded)
+        return list(self.seriesUIDs)
+
+
+class DicomDirectoryImport:
+    """
+    Import of DICOM directories in the SlicerLite database in a single indexing pass, scoped to the series of these
+    directories.
+
+    Only the files which may be DICOM images are indexed. They are found by a DicomFileScan and fed to the indexer
+    in batches while the scan goes on.
+    Without persistent index, all the files of the directories are scanned and the series added to the database are
+    recorded. With the persistent DicomIndexCache, only the new or modified files are scanned and the series of the
+    unchanged files are read from the cache.
+    """
+
+    def __init__(self, dataLoader, directoryPaths: List[str], isBackground: bool):
+        self.dataLoader = dataLoader
+        self.directoryPaths = directoryPaths
+        self.isBackground = isBackground
+        self.indexer = None
+        self._seriesAddedRecorder = None
+        self._scans = []
+        self._fileScan = None
+
+    def start(self, progressCallback=None):
+        db = self.dataLoader.openDatabase()
+        self.indexer = ctk.ctkDICOMIndexer()
+        self.indexer.database = db
+        self.indexer.backgroundImportEnabled = self.isBackground
+        if progressCallback is not None:
+            self.indexer.connect("progress(int)", progressCallback)
+
+        indexCache = self.dataLoader.indexCache
+        if indexCache is None:
+            self._seriesAddedRecorder = SeriesAddedRecorder(db)
+            self._fileScan = DicomFileScan(
+                itertools.chain.from_iterable(iterateDirectoryFiles(path) for path in self.directoryPaths))
+        else:
+            self._scans = [indexCache.scanDirectory(path) for path in self.directoryPaths]
+            for scan in self._scans:
+                for seriesUID in scan.staleSeriesUIDs:
+                    db.removeSeries(seriesUID)
+                # Cached series missing from the database, for instance after a database reset, are indexed again
+                for seriesUID in [uid for uid in scan.cachedSeriesUIDs if uid and not db.filesForSeries(uid, 1)]:
+                    scan.changedFiles += scan.cachedSeriesUIDs.pop(seriesUID)
+            self._fileScan = DicomFileScan([filePath for scan in self._scans for filePath in scan.changedFiles])
+
+        self._fileScan.start()
+        if not self.isBackground:
+            for batch in self._fileScan.iterateBatches():
+                self.indexer.addListOfFiles(batch)
+
+    def isImporting(self):
+        """
+        Feed the indexer with the files found since the last call, return True until the scan and the indexing are done
+        """
+        if self.indexer is None:
+            return False
+        isScanDone = self._fileScan.isDone()
+        for batch in self._fileScan.takeBatches():
+            self.indexer.addListOfFiles(batch)
+        return not isScanDone or self.indexer.isImporting()
+
+    def cancel(self):
+        if self._fileScan is not None:
+            self._fileScan.cancel()
+        if self.indexer is not None:
+            self.indexer.cancel()
+
+    def finish(self, wasCancelled=False) -> List[str]:
+        """
+        Return the UIDs of the series of the imported directories, once the indexer is done.
+        The persistent index is only updated if the import was not cancelled.
+        """
+        db = slicer.dicomDatabase
+        self.indexer = None
+        self._fileScan.cancel()
+        # Dicts used as insertion ordered sets
+        seriesUIDs = {}
+        if self._seriesAddedRecorder is not None:
+            addedSeriesUIDs = self._seriesAddedRecorder.stop()
+            for directoryPath in self.directoryPaths:
+                seriesUIDs.update(dict.fromkeys(
+                    self.dataLoader.getImportedSeriesUIDs(db, directoryPath, addedSeriesUIDs)))
+            return list(seriesUIDs)
+
+        if wasCancelled:
+            return []
+
+        indexCache = self.dataLoader.indexCache
+        for scan in self._scans:
+            # Files which are not DICOM images or could not be indexed are cached without series to skip them on next
+            # import
+            indexedSeriesUIDs = {filePath: db.seriesForFile(filePath) for filePath in scan.changedFiles}
+            indexCache.update(scan, indexedSeriesUIDs)
+            seriesUIDs.update(dict.fromkeys([*scan.cachedSeriesUIDs, *indexedSeriesUIDs.values()]))
+        seriesUIDs = [uid for uid in seriesUIDs if uid]
+
+        protectedSeriesUIDs = set(seriesUIDs) | {key[2] for key in self.dataLoader.alreadyLoadedVolumeHierarchy}
+        for evictedSeriesUID in indexCache.evict(protectedSeriesUIDs):
+            db.removeSeries(evictedSeriesUID)
+        return seriesUIDs
+
+
+class LoadJob:
+    """
+    Asynchronous load of DICOM directories and volume files.
+
+    The headers of all the DICOM directories are indexed in a single pass by a background ctkDICOMIndexer. The volume
+    files and then the DICOM series pixel data are read in parallel by a bounded pool of worker threads, so that the
+    volume files are read while the directories are indexed. The job is polled on the main thread by a QTimer which
+    only creates the MRML nodes of the finished series and notifies the listeners with
+    volumeLoadedSignal(volumeHierarchy, volumeNode).
+    Volumes are always handed over in the submission order, whatever the order in which their reads finish.
+
+    In lazy mode, the DICOM series are not read: they are only notified with seriesDiscoveredSignal(volumeHierarchy,
+    volumeName) and are loaded later with DataLoader.loadSeriesVolume.
+    """
+    PollIntervalMs = 50
+
+    def __init__(self, dataLoader, inputPaths: List[str], isLazy=False):
+        self.dataLoader = dataLoader
+        self.inputPaths = inputPaths
+        self.dicomDirectoryPaths = [path for path in inputPaths if qt.QFileInfo(path).isDir()]
+        self.volumeFilePaths = [path for path in inputPaths if not qt.QFileInfo(path).isDir()]
+        self.isLazy = isLazy
+
+        # (number of finished steps, total number of steps)
+        self.progressSignal = Utils.Signal("int", "int")
+        self.volumeLoadedSignal = Utils.Signal("VolumeHierarchy", "vtkMRMLScalarVolumeNode")
+        self.seriesDiscoveredSignal = Utils.Signal("VolumeHierarchy", "str")
+        # (number of loaded or discovered volumes, was cancelled)
+        self.finishedSignal = Utils.Signal("int", "bool")
+
+        self.loadedVolumeHierarchy = []
+        self.discoveredVolumeHierarchy = []
+        self.errorMessages = []
+        self._cancelEvent = threading.Event()
+        self._volumeCache = getDecodedVolumeCache()
+        self._executor = ThreadPoolExecutor(max_workers=getLoadingWorkerCount())
+        self._pendingReads = []
+        self._nbReadsSubmitted = 0
+        self._dicomImport = None
+        self._indexingProgress = 0
+        self._indexingStartTime = None
+        self._isRunning = False
+        self._timer = qt.QTimer()
+        self._timer.setInterval(LoadJob.PollIntervalMs)
+        self._timer.timeout.connect(self._poll)
+
+    def isRunning(self):
+        return self._isRunning
+
+    def isCancelled(self):
+        return self._cancelEvent.is_set()
+
+    def start(self):
+        self._isRunning = True
+        if self.dicomDirectoryPaths:
+            self._startIndexing()
+        for filePath in self.volumeFilePaths:
+            hierarchy = Model.VolumeHierarchy("", "", "", "", "", filePath)
+            self._submitRead(hierarchy, qt.QFileInfo(filePath).completeBaseName(), readVolumeFileData, filePath,
+                             self._volumeCache)
+        self._timer.start()
+        self._emitProgress()
+
+    def cancel(self):
+        """
+        Stop indexing and reading. Series already added to the scene are kept.
+        """
+        if not self._isRunning:
+            return
+        self._cancelEvent.set()
+        if self._dicomImport is not None:
+            self._dicomImport.cancel()
+        for hierarchy, _, future in self._pendingReads:
+            future.cancel()
+
+    def _startIndexing(self):
+        self._indexingStartTime = time.perf_counter()
+        self._dicomImport = DicomDirectoryImport(self.dataLoader, self.dicomDirectoryPaths, isBackground=True)
+        self._dicomImport.start(self._onIndexingProgress)
+
+    def _onIndexingProgress(self, percent):
+        self._indexingProgress = percent
+        self._emitProgress()
+
+    def _onIndexingFinished(self):
+        importedSeriesUIDs = self._dicomImport.finish(self.isCancelled())
+        self._dicomImport = None
+        self._indexingProgress = 100
+        profiler = getPipelineProfiler()
+        if profiler.isEnabled():
+            profiler.addStageTime(", ".join(self.dicomDirectoryPaths), "indexing",
+                                  time.perf_counter() - self._indexingStartTime)
+        db = slicer.dicomDatabase
+        notLoadedSeries = self.dataLoader.findNotLoadedSeries(db, importedSeriesUIDs)
+        if self.isCancelled():
+            # Series already added to the database are only found again by the next import if marked as unloaded
+            self.dataLoader.unloadedSeriesUIDs.update(seriesUID for _, _, seriesUID, _ in notLoadedSeries)
+            return
+
+        for patientUID, studyUID, seriesUID, description in notLoadedSeries:
+            hierarchy = Model.VolumeHierarchy(patientUID, studyUID, seriesUID, "", description)
+            self.dataLoader.registerLoadedVolumeHierarchy(hierarchy)
+            nodeName = SlicerUtils.getDicomSeriesNodeName(db, seriesUID)
+            if self.isLazy:
+                self.discoveredVolumeHierarchy.append(hierarchy)
+                self.seriesDiscoveredSignal.emit(hierarchy, nodeName)
+            else:
+                self._submitRead(hierarchy, nodeName, readDicomSeriesData, seriesUID, db.filesForSeries(seriesUID),
+                                 self._volumeCache)
+
+    def _submitRead(self, hierarchy, nodeName, readFunction, *args):
+        future = self._executor.submit(readFunction, *args, cancelEvent=self._cancelEvent)
+        self._pendingReads.append((hierarchy, nodeName, future))
+        self._nbReadsSubmitted += 1
+
+    def _poll(self):
+        # Volume files read while the DICOM directories are indexed are handed over without waiting for the indexing
+        if self._dicomImport is not None and not self._dicomImport.isImporting():
+            self._onIndexingFinished()
+
+        # Only hand over the finished reads at the head of the queue to keep a deterministic insertion order
+        nbFinishedReads = 0
+        for hierarchy, nodeName, future in self._pendingReads:
+            if not future.done():
+                break
+            self._onReadFinished(hierarchy, nodeName, future)
+            nbFinishedReads += 1
+        del self._pendingReads[:nbFinishedReads]
+        self._emitProgress()
+
+        if not self._pendingReads and self._dicomImport is None:
+            self._finish()
+
+    def _onReadFinished(self, hierarchy, nodeName, future):
+        volumeData = None
+        isUnsupportedSeries = False
+        if not future.cancelled():
+            try:
+                volumeData = future.result()
+            except LoadCancelledError:
+                pass
+            except UnsupportedDicomSeriesError as e:
+                logging.info(f"{nodeName} is loaded by the DICOM plugins: {e}")
+                isUnsupportedSeries = True
+            except Exception as e:
+                self._addErrorMessage(f"Failed to load {nodeName}: {e}")
+
+        if (volumeData is None and not isUnsupportedSeries) or self.isCancelled():
+            self.dataLoader.volumeDeleted(nodeName, hierarchy)
+            return
+
+        # MRML scene is not thread safe, nodes are only created on the main thread
+        identifier = getVolumeIdentifier(hierarchy)
+        getPipelineProfiler().addCounters(identifier, name=nodeName)
+        if isUnsupportedSeries:
+            with getPipelineProfiler().measureStage(identifier, "loadSeriesByUID"):
+                volumeNode = loadDicomSeriesWithPlugins(hierarchy.seriesUID, nodeName)
+            if volumeNode is None:
+                self._addErrorMessage(f"Failed to load {nodeName}: no volume could be loaded from the series")
+                self.dataLoader.volumeDeleted(nodeName, hierarchy)
+                return
+        else:
+            with getPipelineProfiler().measureStage(identifier, "createVolumeNode"):
+                volumeNode = SlicerUtils.addVolumeNodeFromVolumeData(volumeData, nodeName)
+        if hierarchy.seriesUID:
+            hierarchy.volumeNodeID = volumeNode.GetID()
+        self.loadedVolumeHierarchy.append(hierarchy)
+        self.volumeLoadedSignal.emit(hierarchy, volumeNode)
+
+    def _addErrorMessage(self, message):
+        # Errors are reported by the listeners once the job is finished, a modal dialog here would re-enter the
+        # polling timer
+        logging.error(message)
+        self.errorMessages.append(message)
+
+    def _emitProgress(self):
+        # Indexing is reported as the first step, each read as one additional step
+        nbReadsDone = self._nbReadsSubmitted - len(self._pendingReads)
+        indexingStep = 1 if self.dicomDirectoryPaths else 0
+        indexingDone = 1 if indexingStep and self._dicomImport is None else 0
+        self.progressSignal.emit(nbReadsDone + indexingDone, self._nbReadsSubmitted + indexingStep)
+
+    def _finish(self):
+        self._timer.stop()
+        self._executor.shutdown(wait=False)
+        self._isRunning = False
+        nbListedVolumes = len(self.loadedVolumeHierarchy) + len(self.discoveredVolumeHierarchy)
+        self.finishedSignal.emit(nbListedVolumes, self.isCancelled())
+
+
+class ProgressiveVolumeLoad:
+    """
+    Background load of a listed or unloaded volume, displayed first at a low resolution.
+
+    proxyLoadedSignal(volumeNode) is emitted with a new volume node holding a downsampled proxy of the volume. Once the
+    full resolution voxels are read, they replace the proxy in the same volume node, so that its display, rendering and
+    segmentation bindings stay valid, and fullResolutionLoadedSignal(volumeNode) is emitted. The proxy voxels are then
+    kept in proxyVolumeData, to render the volume while the user interacts with the views.
+    finishedSignal(errorMessage) is always emitted last, with an empty message on success.
+    """
+
+    def __init__(self, volumeHierarchy: Model.VolumeHierarchy, volumeName: str):
+        self.volumeHierarchy = volumeHierarchy
+        self.volumeName = volumeName
+        self.volumeNode = None
+        self.proxyVolumeData = None
+        self.proxyLoadedSignal = Utils.Signal("vtkMRMLScalarVolumeNode")
+        self.fullResolutionLoadedSignal = Utils.Signal("vtkMRMLScalarVolumeNode")
+        self.finishedSignal = Utils.Signal("str")
+
+        self._cancelEvent = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._proxyFuture = Future()
+        self._fullResolutionFuture = None
+        self._timer = qt.QTimer()
+        self._timer.setInterval(LoadJob.PollIntervalMs)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self):
+        volumeCache = getDecodedVolumeCache()
+        maxProxyDimension = SlicerLiteSettings.ProgressiveProxyMaxDimension
+        if self.volumeHierarchy.seriesUID:
+            files = slicer.dicomDatabase.filesForSeries(self.volumeHierarchy.seriesUID)
+            self._fullResolutionFuture = self._executor.submit(
+                readDicomSeriesDataProgressively, self.volumeHierarchy.seriesUID, files, self._proxyFuture,
+                maxProxyDimension, volumeCache, self._cancelEvent)
+        else:
+            self._fullResolutionFuture = self._executor.submit(
+                readVolumeFileDataProgressively, self.volumeHierarchy.filePath, self._proxyFuture, maxProxyDimension,
+                volumeCache, self._cancelEvent)
+        self._timer.start()
+
+    def cancel(self):
+        self._cancelEvent.set()
+
+    def _poll(self):
+        identifier = getVolumeIdentifier(self.volumeHierarchy)
+        # No node is created once the load is cancelled, its item may already be released
+        if self.volumeNode is None and self._proxyFuture.done() and not self._cancelEvent.is_set():
+            getPipelineProfiler().addCounters(identifier, name=self.volumeName)
+            self.proxyVolumeData = self._proxyFuture.result()
+            with getPipelineProfiler().measureStage(identifier, "createVolumeNode"):
+                self.volumeNode = SlicerUtils.addVolumeNodeFromVolumeData(self.proxyVolumeData, self.volumeName)
+            if self.volumeHierarchy.seriesUID:
+                self.volumeHierarchy.volumeNodeID = self.volumeNode.GetID()
+            self.proxyLoadedSignal.emit(self.volumeNode)
+
+        if not self._fullResolutionFuture.done():
+            return
+
+        self._timer.stop()
+        self._executor.shutdown(wait=False)
+        try:
+            volumeData = self._fullResolutionFuture.result()
+        except LoadCancelledError:
+            self.finishedSignal.emit("")
+            return
+        except UnsupportedDicomSeriesError as e:
+            logging.info(f"{self.volumeName} is loaded by the DICOM plugins: {e}")
+            self._loadWithDicomPlugins(identifier)
+            return
+        except Exception as e:
+            logging.error(f"Failed to load {self.volumeName}: {e}")
+            self.finishedSignal.emit(f"Failed to load {self.volumeName}: {e}")
+            return
+
+        # The proxy volume node may have been removed meanwhile if its item was deleted
+        if self.volumeNode is not None and slicer.mrmlScene.IsNodePresent(self.volumeNode):
+            with getPipelineProfiler().measureStage(identifier, "updateVolumeNode"):
+                SlicerUtils.updateVolumeNodeFromVolumeData(self.volumeNode, volumeData)
+            self.fullResolutionLoadedSignal.emit(self.volumeNode)
+        self.finishedSignal.emit("")
+
+    def _loadWithDicomPlugins(self, identifier):
+        """
+        Load the whole series on the main thread. It replaces the proxy if one was read from a subset of the slices,
+        else it is notified both as proxy and full resolution volume.
+        """
+        if self._cancelEvent.is_set():
+            self.finishedSignal.emit("")
+            return
+        with getPipelineProfiler().measureStage(identifier, "loadSeriesByUID"):
+            volumeNode = loadDicomSeriesWithPlugins(self.volumeHierarchy.seriesUID, self.volumeName)
+        if volumeNode is None:
+            self.finishedSignal.emit(f"Failed to load {self.volumeName}: no volume could be loaded from the series")
+            return
+
+        # A proxy read from a subset of slices which are not a single stack is not representative of the volume
+        self.proxyVolumeData = None
+        if self.volumeNode is None:
+            self.volumeNode = volumeNode
+            self.volumeHierarchy.volumeNodeID = self.volumeNode.GetID()
+            self.proxyLoadedSignal.emit(self.volumeNode)
+        elif slicer.mrmlScene.IsNodePresent(self.volumeNode):
+            SlicerUtils.moveVolumeNodeImageData(volumeNode, self.volumeNode)
+        else:
+            SlicerUtils.removeNodeWithDependencies(volumeNode)
+            self.finishedSignal.emit("")
+            return
+        self.fullResolutionLoadedSignal.emit(self.volumeNode)
+        self.finishedSignal.emit("")
+
+
 class DataLoader:
     """
     Object responsible for loading a DICOM and notifying listeners on DICOM Load
     """
 
     def __init__(self):
-        self.alreadyLoadedVolumeHierarchy = []
-        self.database = None
+        # Loaded series indexed by their VolumeHierarchy key
+        self.alreadyLoadedVolumeHierarchy = {}
+        # Series present in the database but not listed, removed from the view or whose load failed or was cancelled
+        self.unloadedSeriesUIDs = set()
+        self.isDatabaseOpened = False
+        self.originalDatabaseDir = None
+        self.indexCache = None
 
     def __del__(self):
-        DICOMUtils.closeTemporaryDatabase(self.database.originalDatabaseDir)
+        if not self.isDatabaseOpened:
+            return
+        # The persistent database is kept for the next sessions
+        isPersistent = self.indexCache is not None
+        if isPersistent:
+            self.indexCache.close()
+        DICOMUtils.closeTemporaryDatabase(self.originalDatabaseDir, cleanup=not isPersistent)
+
+    def openDatabase(self):
+        """
+        Define slicer.dicomDatabase as the SlicerLite database and return it.
+        The database is temporary unless the PersistentDicomIndex setting is enabled. In that case, it is stored in the
+        SlicerLite cache directory with its DicomIndexCache.
+        Initialize lazily because else, it's called earlier during slicer starts
+        """
+        if self.isDatabaseOpened:
+            return slicer.dicomDatabase
+
+        if SlicerLiteSettings.PersistentDicomIndex:
+            cacheDirectory = SlicerUtils.getCacheDirectory()
+            databaseDirectory = os.path.join(cacheDirectory, "DICOMDatabase")
+            # DICOMUtils.openDatabase fails if the directory does not exist
+            os.makedirs(databaseDirectory, exist_ok=True)
+            originalDatabaseDir = slicer.dicomDatabase.databaseDirectory or None
+            if DICOMUtils.openDatabase(databaseDirectory):
+                self.originalDatabaseDir = originalDatabaseDir
+                self.indexCache = DicomIndexCache(os.path.join(cacheDirectory, "DicomIndexCache.sqlite"),
+                                                  SlicerLiteSettings.DicomIndexCacheMaxFileCount)
+            else:
+                # Never import in the user database, the index cache would remove its series
+                logging.error(f"Failed to open the persistent DICOM database {databaseDirectory}, a temporary "
+                              f"database is used instead")
+        if self.indexCache is None:
+            self.originalDatabaseDir = DICOMUtils.openTemporaryDatabase()
+        self.isDatabaseOpened = True
+        return slicer.dicomDatabase
 
     def volumeDeleted(self, deletedVolumeName: str, deletedVolumeHierarchy: Model.VolumeHierarchy):
         """
         Slot called whe a VolumeItem is deleted
         """
-        if deletedVolumeHierarchy in self.alreadyLoadedVolumeHierarchy:
-            self.alreadyLoadedVolumeHierarchy.remove(deletedVolumeHierarchy)
+        if self.alreadyLoadedVolumeHierarchy.pop(deletedVolumeHierarchy.getKey(), None) is not None:
+            self.unloadedSeriesUIDs.add(deletedVolumeHierarchy.seriesUID)
 
-    def loadDicomDirInDBAndExtractVolumesAsItems(self, dicomDirectoryPath: str) -> List[Model.VolumeHierarchy]:
-        loadedVolumeHierarchy = []
+    def registerLoadedVolumeHierarchy(self, volumeHierarchy: Model.VolumeHierarchy):
+        self.alreadyLoadedVolumeHierarchy[volumeHierarchy.getKey()] = volumeHierarchy
+        self.unloadedSeriesUIDs.discard(volumeHierarchy.seriesUID)
+
+    def loadInputDataAsync(self, inputPaths: List[str], isLazy=False) -> LoadJob:
+        """
+        Create and start the asynchronous load of DICOM directories and volume files
+        """
+        job = LoadJob(self, inputPaths, isLazy)
+        job.start()
+        return job
 
-        if not self.database:
-            # Define slicer.dicomDatabase as the created temporary database
-            # Initialize here because else, it's called earlier during slicer starts
-            self.database = DICOMUtils.openTemporaryDatabase()
+    def loadVolumeProgressively(self, volumeHierarchy: Model.VolumeHierarchy, volumeName: str):
+        """
+        Create and start the progressive background load of a listed or unloaded volume
+        """
+        progressiveLoad = ProgressiveVolumeLoad(volumeHierarchy, volumeName)
+        progressiveLoad.start()
+        return progressiveLoad
 
-        db = slicer.dicomDatabase
-        DICOMUtils.importDicom(dicomDirectoryPath, db)
-        for patientUID in db.patients():
-            for studyUID in db.studiesForPatient(patientUID):
-                for seriesUID in db.seriesForStudy(studyUID):
-                    seriesDescription = db.descriptionForSeries(seriesUID)
-                    if not self.isVolumeItemHierarchyAlreadyAdded(patientUID, studyUID, seriesUID, seriesDescription):
-                        volumeNodeID = DICOMUtils.loadSeriesByUID([seriesUID])
-                        if volumeNodeID:
-                            loadedVolumeHierarchy.append(
-                                Model.VolumeHierarchy(patientUID, studyUID, seriesUID, volumeNodeID[0],
-                                                      seriesDescription))
+    def loadSeriesVolume(self, volumeHierarchy: Model.VolumeHierarchy, volumeName: str):
+        """
+        Load the pixel data of a DICOM series listed in lazy mode, or of an unloaded volume, and return its volume node
+        """
+        volumeCache = getDecodedVolumeCache()
+        identifier = getVolumeIdentifier(volumeHierarchy)
+        getPipelineProfiler().addCounters(identifier, name=volumeName)
+        if not volumeHierarchy.seriesUID:
+            volumeData = readVolumeFileData(volumeHierarchy.filePath, volumeCache)
+            with getPipelineProfiler().measureStage(identifier, "createVolumeNode"):
+                return SlicerUtils.addVolumeNodeFromVolumeData(volumeData, volumeName)
 
+        files = slicer.dicomDatabase.filesForSeries(volumeHierarchy.seriesUID)
+        try:
+            volumeData = readDicomSeriesData(volumeHierarchy.seriesUID, files, volumeCache)
+        except UnsupportedDicomSeriesError as e:
+            logging.info(f"{volumeName} is loaded by the DICOM plugins: {e}")
+            with getPipelineProfiler().measureStage(identifier, "loadSeriesByUID"):
+                volumeNode = loadDicomSeriesWithPlugins(volumeHierarchy.seriesUID, volumeName)
+            if volumeNode is None:
+                raise RuntimeError("no volume could be loaded from the series")
+        else:
+            with getPipelineProfiler().measureStage(identifier, "createVolumeNode"):
+                volumeNode = SlicerUtils.addVolumeNodeFromVolumeData(volumeData, volumeName)
+        volumeHierarchy.volumeNodeID = volumeNode.GetID()
+        return volumeNode
+
+    def getImportedSeriesUIDs(self, db, dicomDirectoryPath, addedSeriesUIDs):
+        """
+        Return the series concerned by the import of dicomDirectoryPath: the series newly added to the database and
+        the previously unloaded series whose files are in the directory (the indexer skips already indexed files).
+        """
+        directoryPath = os.path.join(os.path.normcase(os.path.abspath(dicomDirectoryPath)), "")
+        importedSeriesUIDs = list(addedSeriesUIDs)
+        for seriesUID in self.unloadedSeriesUIDs.difference(addedSeriesUIDs):
+            files = db.filesForSeries(seriesUID, 1)
+            if files and os.path.normcase(os.path.abspath(files[0])).startswith(directoryPath):
+                importedSeriesUIDs.append(seriesUID)
+        return importedSeriesUIDs
+
+    def findNotLoadedSeries(self, db, seriesUIDs):
+        """
+        Return the (patientUID, studyUID, seriesUID, seriesDescription) of the input series which have not been
+        loaded yet
+        """
+        notLoadedSeries = []
+        for seriesUID in seriesUIDs:
+            studyUID = db.studyForSeries(seriesUID)
+            patientUID = db.patientForStudy(studyUID)
+            seriesDescription = db.descriptionForSeries(seriesUID)
+            if not self.isVolumeItemHierarchyAlreadyAdded(patientUID, studyUID, seriesUID, seriesDescription):
+                notLoadedSeries.append((patientUID, studyUID, seriesUID, seriesDescription))
+        return notLoadedSeries
+
+    def loadDicomDirInDBAndExtractVolumesAsItems(self, dicomDirectoryPaths: List[str],
+                                                 isLazy=False) -> List[Model.VolumeHierarchy]:
+        """
+        Import the DICOM directories in a single indexing pass and load their new series.
+        In lazy mode, the series are not loaded and their VolumeHierarchy have no volume node ID.
+        """
+        loadedVolumeHierarchy = []
+        errorMessages = []
+
+        db = self.openDatabase()
+        dicomImport = DicomDirectoryImport(self, dicomDirectoryPaths, isBackground=False)
+        dicomImport.start()
+        importedSeriesUIDs = dicomImport.finish()
+        for patientUID, studyUID, seriesUID, seriesDescription in self.findNotLoadedSeries(db, importedSeriesUIDs):
+            volumeHierarchy = Model.VolumeHierarchy(patientUID, studyUID, seriesUID, "", seriesDescription)
+            if not isLazy:
+                # Same read as the other load paths: decoded volume cache, foreground cropping and plugins fallback
+                volumeName = SlicerUtils.getDicomSeriesNodeName(db, seriesUID)
+                try:
+                    self.loadSeriesVolume(volumeHierarchy, volumeName)
+                except Exception as e:
+                    logging.error(f"Failed to load {volumeName}: {e}")
+                    errorMessages.append(f"Failed to load {volumeName}: {e}")
+                    self.unloadedSeriesUIDs.add(seriesUID)
+                    continue
+            loadedVolumeHierarchy.append(volumeHierarchy)
+
+        if errorMessages:
+            slicer.util.errorDisplay("\n".join(errorMessages))
         if not loadedVolumeHierarchy:
-            slicer.util.warningDisplay("No volume has been found from DICOM directory or volume already added.")
+            if not errorMessages:
+                slicer.util.warningDisplay("No volume has been found from DICOM directory or volume already added.")
             return []
 
-        self.alreadyLoadedVolumeHierarchy += loadedVolumeHierarchy
+        for volumeHierarchy in loadedVolumeHierarchy:
+            self.registerLoadedVolumeHierarchy(volumeHierarchy)
         return loadedVolumeHierarchy
 
     def isVolumeItemHierarchyAlreadyAdded(self, patientUID, studyUID, seriesUID, description):
         """
         Check if the input VolumeHierarchy has already been added before
         """
-        for volumeItem in self.alreadyLoadedVolumeHierarchy:
-            if (
-                    volumeItem.patientUID == patientUID and
-                    volumeItem.studyUID == studyUID and
-                    volumeItem.seriesUID == seriesUID and
-                    volumeItem.seriesDescription == description
-            ):
-                return True
-        return False
+        return (patientUID, studyUID, seriesUID, description) in self.alreadyLoadedVolumeHierarchy
@@ -1,17 +1,23 @@
 from enum import Enum
 import qt
-import ctk
 
-from SlicerLiteLib import Model, Utils, SlicerUtils
+from SlicerLiteLib import Utils, showDicomSeriesMetadata
 
 
 def getItem(index: qt.QModelIndex):
-    return index.data(Model.VolumeItemModel.ItemUserRole)
+    return index.model().getVolumeItemFromId(index.row())
 
 
 class ButtonItemDelegate(qt.QStyledItemDelegate):
+    """
+    Paint a button in the cells of the current row and call onButtonClicked when it is pressed.
+    The buttons are painted instead of being persistent editor widgets, so that no widget is created per row.
+    """
+    ButtonSize = 22
+
     def __init__(self, parent=None):
         super(ButtonItemDelegate, self).__init__(parent)
+        self._icon = None
 
     def getIcon(self):
         pass
@@ -19,29 +25,43 @@ class ButtonItemDelegate(qt.QStyledItemDelegate):
     def onButtonClicked(self, model: qt.QAbstractItemModel, index: qt.QModelIndex):
         pass
 
-    def sizeHint(self, option: qt.QStyleOptionViewItem, index: qt.QModelIndex):
-        return qt.QSize(22, 22)
+    def hasButton(self, index: qt.QModelIndex):
+        return index.column() in (1, 2) and index.row() == index.model().getCurrentVolumeId()
 
-    def createEditor(self, parent, option, index):
-        if index.column() not in (1, 2):
-            return None
+    def sizeHint(self, option: qt.QStyleOptionViewItem, index: qt.QModelIndex):
+        return qt.QSize(ButtonItemDelegate.ButtonSize, ButtonItemDelegate.ButtonSize)
 
-        button = qt.QPushButton(parent)
-        button.icon = self.getIcon()
-        button.iconSize = qt.QSize(22, 22)
-        button.setMinimumSize(qt.QSize(22, 22))
-        button.clicked.connect(lambda _: self.onButtonClicked(index.model(), index))
-        return button
+    def paint(self, painter: qt.QPainter, option: qt.QStyleOptionViewItem, index: qt.QModelIndex):
+        if not self.hasButton(index):
+            super().paint(painter, option, index)
+            return
 
-    def updateEditorGeometry(self, editor: qt.QWidget, option: 'QStyleOptionViewItem', index: qt.QModelIndex):
-        if editor:
-            editor.setGeometry(option.rect)
+        buttonOption = qt.QStyleOptionButton()
+        buttonOption.rect = option.rect
+        if self._icon is None:
+            self._icon = self.getIcon()
+        buttonOption.icon = self._icon
+        buttonOption.iconSize = qt.QSize(ButtonItemDelegate.ButtonSize, ButtonItemDelegate.ButtonSize)
+        buttonOption.state = qt.QStyle.State_Enabled | qt.QStyle.State_Raised
+        qt.QApplication.style().drawControl(qt.QStyle.CE_PushButton, buttonOption, painter)
+
+    def editorEvent(self, event: qt.QEvent, model: qt.QAbstractItemModel, option: qt.QStyleOptionViewItem,
+                    index: qt.QModelIndex):
+        # Handled on press, so that the view doesn't emit clicked for a row removed by the button
+        if event.type() != qt.QEvent.MouseButtonPress or event.button() != qt.Qt.LeftButton:
+            return False
+        if not self.hasButton(index) or not option.rect.contains(event.pos()):
+            return False
+        self.onButtonClicked(model, index)
+        return True
 
 
 class DeleteButtonItemDelegate(ButtonItemDelegate):
 
     def __init__(self, parent=None):
         super(DeleteButtonItemDelegate, self).__init__(parent)
+        # Emitted with the deleted VolumeItem, to release its nodes
+        self.itemDeletedSignal = Utils.Signal()
         self.modelDeletedSignal = Utils.Signal()
 
     def getIcon(self):
@@ -52,26 +72,18 @@ class DeleteButtonItemDelegate(ButtonItemDelegate):
         volumeName = item.volumeName
         volumeHierarchy = item.volumeHierarchy
         model.removeRow(index.row())
-        del item
+        self.itemDeletedSignal.emit(item)
         self.modelDeletedSignal.emit(volumeName, volumeHierarchy)
 
 
 class DicomMetadataButtonItemDelegate(ButtonItemDelegate):
 
-    def createEditor(self, parent, option, index):
-        if not index.model().getVolumeItemFromId(index.row()).isDicomVolumeItem():
-            return
-        return super().createEditor(parent, option, index)
+    def hasButton(self, index: qt.QModelIndex):
+        return super().hasButton(index) and getItem(index).isDicomVolumeItem()
 
     def getIcon(self):
         return Utils.getIcon("metadata")
 
     def onButtonClicked(self, model: qt.QAbstractItemModel, index: qt.QModelIndex):
         item = getItem(index)
-        dicom_widget = SlicerUtils.getDicomWidget()
-        dicom_browser = dicom_widget.browserWidget.dicomBrowser
-        dicom_browser.dicomTableManager().setCurrentPatientsSelection([item.volumeHierarchy.patientUID])
-        dicom_browser.dicomTableManager().setCurrentStudiesSelection([item.volumeHierarchy.studyUID])
-        dicom_browser.dicomTableManager().setCurrentSeriesSelection([item.volumeHierarchy.seriesUID])
-
-        dicom_browser.showMetadata(dicom_browser.fileListForCurrentSelection(ctk.ctkDICOMModel.SeriesType))
+        showDicomSeriesMetadata(item.volumeHierarchy.seriesUID, item.volumeName)
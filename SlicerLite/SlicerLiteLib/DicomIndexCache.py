@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+
+@dataclass
+class DirectoryScan:
+    """
+    Result of the comparison of a directory content with the DicomIndexCache
+    """
+    directoryPath: str
+    # Size and modification time of every file of the directory
+    fileStats: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+    # Files new or modified since they were indexed
+    changedFiles: List[str] = field(default_factory=list)
+    # Series of the unchanged files ("" for the files which are not DICOM)
+    cachedSeriesUIDs: Dict[str, List[str]] = field(default_factory=dict)
+    # Indexed files which are not in the directory anymore
+    removedFiles: List[str] = field(default_factory=list)
+    # Series which lost files, to remove from the DICOM database before their remaining files are indexed again
+    staleSeriesUIDs: Set[str] = field(default_factory=set)
+
+
+class DicomIndexCache:
+    """
+    Persistent index of the DICOM files imported in the SlicerLite database.
+
+    Each file is keyed by its path, size and modification time and associated to its series UID, so that re-importing a
+    directory only indexes the new or modified files and gets the series of the other ones from the cache.
+    The number of indexed files is capped, the least recently imported series are evicted first.
+    """
+
+    def __init__(self, cacheFilePath: str, maxFileCount: int):
+        self.cacheFilePath = cacheFilePath
+        self.maxFileCount = maxFileCount
+        os.makedirs(os.path.dirname(cacheFilePath), exist_ok=True)
+        self._connection = sqlite3.connect(cacheFilePath)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS Files ("
+                "FilePath TEXT PRIMARY KEY, Size INTEGER, ModifiedTime REAL, SeriesUID TEXT, LastAccess REAL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS FilesSeriesUID ON Files(SeriesUID)")
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def _normalizePath(filePath):
+        # Same separators as the paths stored by the DICOM database
+        return os.path.abspath(filePath).replace(os.sep, "/")
+
+    def scanDirectory(self, directoryPath: str) -> DirectoryScan:
+        """
+        Walk the directory and compare its files with their cached size and modification time
+        """
+        scan = DirectoryScan(self._normalizePath(directoryPath))
+        for root, _, fileNames in os.walk(scan.directoryPath):
+            for fileName in fileNames:
+                filePath = self._normalizePath(os.path.join(root, fileName))
+                try:
+                    fileStat = os.stat(filePath)
+                except OSError:
+                    continue
+                scan.fileStats[filePath] = (fileStat.st_size, fileStat.st_mtime)
+
+        for filePath, size, modifiedTime, seriesUID in self._getEntriesInDirectory(scan.directoryPath):
+            if filePath not in scan.fileStats:
+                scan.removedFiles.append(filePath)
+                if seriesUID:
+                    scan.staleSeriesUIDs.add(seriesUID)
+            elif scan.fileStats[filePath] == (size, modifiedTime):
+                scan.cachedSeriesUIDs.setdefault(seriesUID, []).append(filePath)
+
+        # The DICOM database still lists the removed files of the stale series, their other files are not cached
+        for seriesUID in scan.staleSeriesUIDs:
+            scan.cachedSeriesUIDs.pop(seriesUID, None)
+        cachedFiles = {filePath for files in scan.cachedSeriesUIDs.values() for filePath in files}
+        scan.changedFiles = [filePath for filePath in scan.fileStats if filePath not in cachedFiles]
+        return scan
+
+    def _getEntriesInDirectory(self, directoryPath):
+        # Prefix range query to use the primary key index
+        prefix = directoryPath.rstrip("/") + "/"
+        return self._connection.execute(
+            "SELECT FilePath, Size, ModifiedTime, SeriesUID FROM Files WHERE FilePath >= ? AND FilePath < ?",
+            (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))).fetchall()
+
+    def update(self, scan: DirectoryScan, seriesUIDForIndexedFiles: Dict[str, str]):
+        """
+        Store the series of the newly indexed files, refresh the access time of the cached ones and drop the removed
+        files
+        """
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO Files VALUES (?, ?, ?, ?, ?)",
+                [(filePath, *scan.fileStats[filePath], seriesUID, now)
+                 for filePath, seriesUID in seriesUIDForIndexedFiles.items()])
+            self._connection.executemany(
+                "UPDATE Files SET LastAccess = ? WHERE FilePath = ?",
+                [(now, filePath) for files in scan.cachedSeriesUIDs.values() for filePath in files])
+            self._connection.executemany("DELETE FROM Files WHERE FilePath = ?",
+                                         [(filePath,) for filePath in scan.removedFiles])
+
+    def invalidateSeries(self, seriesUIDs):
+        """
+        Remove the files of the input series from the cache, so that they are indexed again on next import
+        """
+        with self._connection:
+            self._connection.executemany("DELETE FROM Files WHERE SeriesUID = ?", [(uid,) for uid in seriesUIDs])
+
+    def getFileCount(self):
+        return self._connection.execute("SELECT COUNT(*) FROM Files").fetchone()[0]
+
+    def evict(self, protectedSeriesUIDs: Set[str]) -> List[str]:
+        """
+        Remove the least recently imported series until the number of cached files fits in the cap.
+        Return the evicted series UIDs, which should also be removed from the DICOM database.
+        """
+        fileCount = self.getFileCount()
+        if fileCount <= self.maxFileCount:
+            return []
+
+        evictedSeriesUIDs = []
+        seriesByAccess = self._connection.execute(
+            "SELECT SeriesUID, COUNT(*) FROM Files GROUP BY SeriesUID ORDER BY MAX(LastAccess)").fetchall()
+        for seriesUID, seriesFileCount in seriesByAccess:
+            if fileCount <= self.maxFileCount:
+                break
+            if seriesUID in protectedSeriesUIDs:
+                continue
+            evictedSeriesUIDs.append(seriesUID)
+            fileCount -= seriesFileCount
+
+        self.invalidateSeries(evictedSeriesUIDs)
+        return [seriesUID for seriesUID in evictedSeriesUIDs if seriesUID]
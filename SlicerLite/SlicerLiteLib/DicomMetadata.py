@@ -0,0 +1,223 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import qt
+import slicer
+
+_seriesMetadataCache = OrderedDict()
+_metadataDialog = None
+
+
+def _formatDicomValue(element, maxLength=256):
+    if element.VR == "SQ":
+        return f"Sequence of {len(element.value)} item(s)"
+    value = str(element.value)
+    return value if len(value) <= maxLength else value[:maxLength] + "..."
+
+
+def readDicomTags(filePath):
+    """
+    Return the {tag: value} and {tag: name} dicts of the top level elements of a DICOM file, without its pixel data
+    """
+    import pydicom
+
+    dataset = pydicom.dcmread(filePath, stop_before_pixels=True)
+    values, names = {}, {}
+    for element in dataset:
+        tag = f"({element.tag.group:04X},{element.tag.element:04X})"
+        values[tag] = _formatDicomValue(element)
+        names[tag] = element.name
+    return values, names
+
+
+class SeriesMetadata:
+    """
+    Tags of the instances of a DICOM series, split between the tags having the same value in all the instances and the
+    tags differing between instances.
+    Instances are added by a worker thread while the main thread reads the current state.
+    """
+
+    def __init__(self, seriesUID, filePaths):
+        self.seriesUID = seriesUID
+        self.filePaths = filePaths
+        self.isComplete = False
+        self._names = {}
+        self._commonValues = {}
+        self._varyingTags = set()
+        self._instanceValues = []
+        self._lock = threading.Lock()
+
+    def addInstance(self, filePath, values, names):
+        with self._lock:
+            if not self._instanceValues:
+                self._commonValues = dict(values)
+            else:
+                for tag, value in list(self._commonValues.items()):
+                    if values.get(tag) != value:
+                        del self._commonValues[tag]
+                        self._varyingTags.add(tag)
+                self._varyingTags.update(tag for tag in values if tag not in self._commonValues)
+            self._instanceValues.append((filePath, values))
+            self._names.update(names)
+
+    def getState(self):
+        """
+        Return the number of read instances, the {tag: value} dict of the common tags and the set of varying tags
+        """
+        with self._lock:
+            return len(self._instanceValues), dict(self._commonValues), set(self._varyingTags)
+
+    def getName(self, tag):
+        with self._lock:
+            return self._names.get(tag, "")
+
+    def getInstanceValues(self, tag):
+        """
+        Return the (file path, value) of the tag for the read instances
+        """
+        with self._lock:
+            return [(filePath, values.get(tag, "")) for filePath, values in self._instanceValues]
+
+
+def readSeriesMetadata(seriesMetadata: SeriesMetadata, cancelEvent: threading.Event):
+    """
+    Read the tags of the series instances one by one. Can run in a worker thread.
+    """
+    for filePath in seriesMetadata.filePaths:
+        if cancelEvent.is_set():
+            return
+        try:
+            values, names = readDicomTags(filePath)
+        except Exception as e:
+            logging.warning(f"Failed to read the DICOM tags of {filePath}: {e}")
+            continue
+        seriesMetadata.addInstance(filePath, values, names)
+    seriesMetadata.isComplete = True
+
+
+class DicomMetadataDialog(qt.QDialog):
+    """
+    Non modal dialog listing the tags of a DICOM series, filled in while they are read in the background.
+    Tags with the same value in all instances are listed once, the values of the other tags are listed per instance
+    when their item is expanded.
+    """
+    RefreshIntervalMs = 100
+    # Number of series whose tags are kept in memory once read
+    CacheSize = 16
+
+    def __init__(self, seriesUID, title, parent=None):
+        super(DicomMetadataDialog, self).__init__(parent)
+        self.setWindowTitle(f"DICOM tags - {title}")
+        self.resize(800, 600)
+
+        self.statusLabel = qt.QLabel()
+        self.treeWidget = qt.QTreeWidget()
+        self.treeWidget.setHeaderLabels(["Tag", "Name", "Value"])
+        self.treeWidget.itemExpanded.connect(self.onItemExpanded)
+        self.commonRootItem = qt.QTreeWidgetItem(["Common to all instances"])
+        self.varyingRootItem = qt.QTreeWidgetItem(["Differing between instances"])
+        self.treeWidget.addTopLevelItem(self.commonRootItem)
+        self.treeWidget.addTopLevelItem(self.varyingRootItem)
+        self.commonRootItem.setExpanded(True)
+        layout = qt.QVBoxLayout(self)
+        layout.addWidget(self.statusLabel)
+        layout.addWidget(self.treeWidget)
+
+        self._commonItems = {}
+        self._varyingItems = {}
+        self._nbDisplayedInstances = -1
+        self._cancelEvent = threading.Event()
+        self._executor = None
+        self.seriesMetadata = self._getSeriesMetadata(seriesUID)
+
+        self._timer = qt.QTimer()
+        self._timer.setInterval(DicomMetadataDialog.RefreshIntervalMs)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+        self.refresh()
+
+    def _getSeriesMetadata(self, seriesUID):
+        seriesMetadata = _seriesMetadataCache.get(seriesUID)
+        if seriesMetadata is not None:
+            _seriesMetadataCache.move_to_end(seriesUID)
+            return seriesMetadata
+
+        seriesMetadata = SeriesMetadata(seriesUID, slicer.dicomDatabase.filesForSeries(seriesUID))
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._executor.submit(readSeriesMetadata, seriesMetadata, self._cancelEvent)
+        _seriesMetadataCache[seriesUID] = seriesMetadata
+        while len(_seriesMetadataCache) > DicomMetadataDialog.CacheSize:
+            _seriesMetadataCache.popitem(last=False)
+        return seriesMetadata
+
+    def refresh(self):
+        """
+        Update the tree with the instances read since the last refresh
+        """
+        isComplete = self.seriesMetadata.isComplete
+        nbInstances, commonValues, varyingTags = self.seriesMetadata.getState()
+        if nbInstances != self._nbDisplayedInstances:
+            self._nbDisplayedInstances = nbInstances
+            for tag in [tag for tag in self._commonItems if tag not in commonValues]:
+                self.commonRootItem.removeChild(self._commonItems.pop(tag))
+            for tag, value in commonValues.items():
+                if tag not in self._commonItems:
+                    self._commonItems[tag] = qt.QTreeWidgetItem([tag, self.seriesMetadata.getName(tag), value])
+                    self.commonRootItem.addChild(self._commonItems[tag])
+            for tag in varyingTags:
+                if tag not in self._varyingItems:
+                    item = qt.QTreeWidgetItem([tag, self.seriesMetadata.getName(tag), "Click to show per instance"])
+                    item.setChildIndicatorPolicy(qt.QTreeWidgetItem.ShowIndicator)
+                    self._varyingItems[tag] = item
+                    self.varyingRootItem.addChild(item)
+            self.commonRootItem.sortChildren(0, qt.Qt.AscendingOrder)
+            self.varyingRootItem.sortChildren(0, qt.Qt.AscendingOrder)
+
+        nbFiles = len(self.seriesMetadata.filePaths)
+        if isComplete:
+            self._timer.stop()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.statusLabel.setText(f"{nbFiles} instance(s)")
+        else:
+            self.statusLabel.setText(f"Reading instance tags: {nbInstances} / {nbFiles}")
+
+    def onItemExpanded(self, item):
+        """
+        List the per instance values of a differing tag, read again at each expansion while the series is being read
+        """
+        tag = item.text(0)
+        if tag not in self._varyingItems or self._varyingItems[tag] is not item:
+            return
+        item.takeChildren()
+        for filePath, value in self.seriesMetadata.getInstanceValues(tag):
+            item.addChild(qt.QTreeWidgetItem(["", os.path.basename(filePath), value]))
+
+    def done(self, result):
+        self._timer.stop()
+        if not self.seriesMetadata.isComplete and self._executor is not None:
+            # Partially read series are not kept in the cache
+            self._cancelEvent.set()
+            self._executor.shutdown(wait=False)
+            _seriesMetadataCache.pop(self.seriesMetadata.seriesUID, None)
+        super().done(result)
+
+
+def clearSeriesMetadataCache():
+    _seriesMetadataCache.clear()
+
+
+def showDicomSeriesMetadata(seriesUID, title):
+    """
+    Open the metadata dialog of the series, replacing the previously opened one
+    """
+    global _metadataDialog
+    if _metadataDialog is not None:
+        _metadataDialog.close()
+    _metadataDialog = DicomMetadataDialog(seriesUID, title, slicer.util.mainWindow())
+    _metadataDialog.show()
+    return _metadataDialog
@@ -1,4 +1,6 @@
 import qt
+import slicer
+import vtk
 
 
 class DragAndDropEventFilter(qt.QWidget):
@@ -12,7 +14,83 @@ class DragAndDropEventFilter(qt.QWidget):
             return False
 
         event.accept()
-        for url in event.mimeData().urls():
-            if self.callback:
-                self.callback(url.path()[1:])
+        # All the dropped paths are loaded together
+        self.callback([url.toLocalFile() for url in event.mimeData().urls()])
         return True
+
+
+class ThreeDViewInteractionObserver:
+    """
+    Notify the start and the end of the camera interactions in the 3D views: drags with any mouse button and wheel
+    zooms. A click without drag is not an interaction.
+    """
+    WheelInteractionEndDelayMs = 300
+
+    def __init__(self, startCallback, endCallback):
+        self.startCallback = startCallback
+        self.endCallback = endCallback
+        self._isButtonPressed = False
+        self._isInteracting = False
+        self._observations = []
+        self._wheelTimer = qt.QTimer()
+        self._wheelTimer.setSingleShot(True)
+        self._wheelTimer.setInterval(ThreeDViewInteractionObserver.WheelInteractionEndDelayMs)
+        self._wheelTimer.timeout.connect(self._endInteraction)
+
+    def observeViews(self):
+        """
+        Observe the interactors of the 3D views of the current layout
+        """
+        self.removeObservers()
+        layoutManager = slicer.app.layoutManager()
+        # No views when Slicer runs headless, with --no-main-window
+        if layoutManager is None:
+            return
+        eventCallbacks = [
+            (vtk.vtkCommand.LeftButtonPressEvent, self._onButtonPressed),
+            (vtk.vtkCommand.MiddleButtonPressEvent, self._onButtonPressed),
+            (vtk.vtkCommand.RightButtonPressEvent, self._onButtonPressed),
+            (vtk.vtkCommand.LeftButtonReleaseEvent, self._onButtonReleased),
+            (vtk.vtkCommand.MiddleButtonReleaseEvent, self._onButtonReleased),
+            (vtk.vtkCommand.RightButtonReleaseEvent, self._onButtonReleased),
+            (vtk.vtkCommand.MouseMoveEvent, self._onMouseMoved),
+            (vtk.vtkCommand.MouseWheelForwardEvent, self._onWheel),
+            (vtk.vtkCommand.MouseWheelBackwardEvent, self._onWheel),
+        ]
+        for viewIndex in range(layoutManager.threeDViewCount):
+            interactor = layoutManager.threeDWidget(viewIndex).threeDView().interactor()
+            for event, callback in eventCallbacks:
+                self._observations.append((interactor, interactor.AddObserver(event, callback)))
+
+    def removeObservers(self):
+        for interactor, observerTag in self._observations:
+            interactor.RemoveObserver(observerTag)
+        self._observations = []
+        self._wheelTimer.stop()
+        self._isButtonPressed = False
+        self._endInteraction()
+
+    def _onButtonPressed(self, caller, event):
+        self._isButtonPressed = True
+
+    def _onButtonReleased(self, caller, event):
+        self._isButtonPressed = False
+        self._endInteraction()
+
+    def _onMouseMoved(self, caller, event):
+        if self._isButtonPressed:
+            self._startInteraction()
+
+    def _onWheel(self, caller, event):
+        self._startInteraction()
+        self._wheelTimer.start()
+
+    def _startInteraction(self):
+        if not self._isInteracting:
+            self._isInteracting = True
+            self.startCallback()
+
+    def _endInteraction(self):
+        if self._isInteracting and not self._isButtonPressed and not self._wheelTimer.isActive():
+            self._isInteracting = False
+            self.endCallback()
@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from SlicerLiteLib import SlicerLiteSettings
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the peak memory is then not reported
+    resource = None
+
+
+def getPeakMemoryBytes():
+    """
+    Return the peak resident memory of the process in bytes, or None if it is not available on the platform
+    """
+    if resource is None:
+        return None
+    peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux
+    return peakMemory if sys.platform == "darwin" else peakMemory * 1024
+
+
+def getResidentMemoryBytes():
+    """
+    Return the current resident memory of the process in bytes, or None if it is not available on the platform
+    """
+    try:
+        with open("/proc/self/statm") as statmFile:
+            return int(statmFile.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def getVolumeIdentifier(volumeHierarchy):
+    """
+    Return the identifier of a volume in the pipeline report: its series UID, or its file path if not DICOM
+    """
+    return volumeHierarchy.seriesUID or volumeHierarchy.filePath
+
+
+class PipelineProfiler:
+    """
+    Opt-in instrumentation of the load pipeline, enabled by the PipelineInstrumentation setting.
+
+    Records for each volume the wall time of its pipeline stages, the bytes read, its voxel count and the change of
+    the process resident memory across each of its measured stages. Stages can be measured from worker threads, the
+    memory change of a stage then also includes the allocations of the stages running at the same time.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def isEnabled():
+        return SlicerLiteSettings.PipelineInstrumentation
+
+    def _getRecord(self, identifier):
+        return self._records.setdefault(identifier, {
+            "name": "",
+            "stages": {},
+            "bytesRead": 0,
+            "voxelCount": 0,
+            "residentMemoryDeltaBytes": None,
+        })
+
+    @contextmanager
+    def measureStage(self, identifier, stage):
+        """
+        Context manager adding the wall time of the enclosed code to the stage of the volume.
+        Nothing is recorded without volume identifier.
+        """
+        if not identifier or not self.isEnabled():
+            yield
+            return
+        startMemoryBytes = getResidentMemoryBytes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            endMemoryBytes = getResidentMemoryBytes()
+            memoryDeltaBytes = None if startMemoryBytes is None or endMemoryBytes is None else \
+                endMemoryBytes - startMemoryBytes
+            self.addStageTime(identifier, stage, seconds, memoryDeltaBytes)
+
+    def addStageTime(self, identifier, stage, seconds, memoryDeltaBytes=None):
+        """
+        Add the wall time of a stage of the volume, with the change of the process resident memory across the stage if
+        it was measured
+        """
+        with self._lock:
+            record = self._getRecord(identifier)
+            stageRecord = record["stages"].setdefault(stage, {"seconds": 0.0, "count": 0})
+            stageRecord["seconds"] += seconds
+            stageRecord["count"] += 1
+            if memoryDeltaBytes is not None:
+                stageRecord["residentMemoryDeltaBytes"] = stageRecord.get("residentMemoryDeltaBytes", 0) + \
+                    memoryDeltaBytes
+                record["residentMemoryDeltaBytes"] = (record["residentMemoryDeltaBytes"] or 0) + memoryDeltaBytes
+
+    def addCounters(self, identifier, name=None, bytesRead=0, voxelCount=0):
+        if not self.isEnabled():
+            return
+        with self._lock:
+            record = self._getRecord(identifier)
+            if name:
+                record["name"] = name
+            record["bytesRead"] += bytesRead
+            record["voxelCount"] = max(record["voxelCount"], voxelCount)
+
+    def reset(self):
+        with self._lock:
+            self._records = {}
+
+    def getReport(self):
+        """
+        Return the per volume records, with the total time of each stage over all the volumes and the peak resident
+        memory of the process since its start
+        """
+        with self._lock:
+            volumes = json.loads(json.dumps(self._records))
+        stageTotals = {}
+        for record in volumes.values():
+            for stage, stageRecord in record["stages"].items():
+                stageTotals[stage] = stageTotals.get(stage, 0.0) + stageRecord["seconds"]
+        return {"volumes": volumes, "stageTotalSeconds": stageTotals, "processPeakMemoryBytes": getPeakMemoryBytes()}
+
+    def writeReport(self, filePath):
+        with open(filePath, "w") as reportFile:
+            json.dump(self.getReport(), reportFile, indent=2)
+
+
+# Created at import, as it is used by the worker threads
+_pipelineProfiler = PipelineProfiler()
+
+
+def getPipelineProfiler() -> PipelineProfiler:
+    return _pipelineProfiler
@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+from SlicerLiteLib import SlicerLiteSettings
+
+
+class VolumeItemMemoryBudget:
+    """
+    Keep the memory used by the loaded VolumeItems pixel data under a budget.
+
+    Items are kept in least recently viewed order. When the budget is exceeded, the pixel data of the least recently
+    viewed items which are not visible are unloaded. Unloaded items are reloaded by their owner when selected again.
+    """
+
+    def __init__(self, budgetBytes=None):
+        self._budgetBytes = budgetBytes
+        # Loaded items from least to most recently viewed, indexed by the id of their VolumeHierarchy
+        self._residentItems = OrderedDict()
+        self._evictedItemIds = set()
+        self.evictionCount = 0
+        self.evictedBytes = 0
+        self.reloadCount = 0
+
+    def getBudgetBytes(self):
+        """
+        Return the budget in bytes, read from the MemoryBudgetMB setting if not given at construction.
+        0 means that the memory is not limited.
+        """
+        if self._budgetBytes is not None:
+            return self._budgetBytes
+        return int(SlicerLiteSettings.MemoryBudgetMB * 1024 * 1024)
+
+    def getResidentBytes(self):
+        return sum(item.getMemorySize() for item in self._residentItems.values())
+
+    def touch(self, volumeItem):
+        """
+        Mark the item as the most recently viewed one. Must be called each time an item is loaded or selected.
+        """
+        if not volumeItem.isLoaded():
+            return
+        itemId = id(volumeItem.volumeHierarchy)
+        if itemId in self._evictedItemIds:
+            self._evictedItemIds.remove(itemId)
+            self.reloadCount += 1
+        self._residentItems[itemId] = volumeItem
+        self._residentItems.move_to_end(itemId)
+
+    def volumeDeleted(self, deletedVolumeName: str, deletedVolumeHierarchy):
+        """
+        Slot called when a VolumeItem is deleted, stop tracking it
+        """
+        self._residentItems.pop(id(deletedVolumeHierarchy), None)
+        self._evictedItemIds.discard(id(deletedVolumeHierarchy))
+
+    def evictIfNeeded(self):
+        """
+        Unload the least recently viewed and not visible items until the resident memory fits in the budget.
+        Return the list of the unloaded items.
+        """
+        budgetBytes = self.getBudgetBytes()
+        if budgetBytes <= 0:
+            return []
+
+        residentBytes = self.getResidentBytes()
+        evictedItems = []
+        for itemId, volumeItem in list(self._residentItems.items()):
+            if residentBytes <= budgetBytes:
+                break
+            if not volumeItem.isLoaded():
+                del self._residentItems[itemId]
+                continue
+            if volumeItem.getVisibility():
+                continue
+
+            itemBytes = volumeItem.getMemorySize()
+            volumeItem.unloadVolumeData()
+            del self._residentItems[itemId]
+            self._evictedItemIds.add(itemId)
+            residentBytes -= itemBytes
+            self.evictionCount += 1
+            self.evictedBytes += itemBytes
+            evictedItems.append(volumeItem)
+        return evictedItems
+
+    def getStatistics(self):
+        """
+        Return the current residency and the eviction counters
+        """
+        return {
+            "budgetBytes": self.getBudgetBytes(),
+            "residentBytes": self.getResidentBytes(),
+            "residentItemCount": len(self._residentItems),
+            "evictedItemCount": len(self._evictedItemIds),
+            "evictionCount": self.evictionCount,
+            "evictedBytes": self.evictedBytes,
+            "reloadCount": self.reloadCount,
+        }
@@ -1,9 +1,13 @@
+import numpy as np
 import qt
 import slicer
+import vtk
 
 from dataclasses import dataclass
+from vtk.util import numpy_support
 
-from SlicerLiteLib import SlicerUtils
+from SlicerLiteLib import SlicerUtils, SlicerLiteSettings, getForegroundBox, getRenderingPresetRegistry, \
+    getPipelineProfiler, getVolumeIdentifier
 
 
 @dataclass
@@ -14,89 +18,502 @@ class VolumeHierarchy:
     seriesUID: str
     volumeNodeID: str
     seriesDescription: str
+    # Source file of the volumes which are not loaded from DICOM, used to reload them
+    filePath: str = ""
+
+    def getKey(self):
+        """
+        Return the key identifying the loaded series, independently of its volume node
+        """
+        return self.patientUID, self.studyUID, self.seriesUID, self.seriesDescription
+
+
+class VolumeStatistics:
+    """
+    Scalar statistics of an image data: range, histogram and histogram based percentiles.
+    Computed with vectorized passes over the voxels and valid until the image data is modified.
+    """
+    HistogramBinCount = 4096
+
+    def __init__(self, imageData):
+        scalars = imageData.GetPointData().GetScalars()
+        array = numpy_support.vtk_to_numpy(scalars)
+        self.minimum = float(array.min())
+        self.maximum = float(array.max())
+        if self.maximum > self.minimum:
+            self.histogram, self.binEdges = np.histogram(array, bins=VolumeStatistics.HistogramBinCount,
+                                                         range=(self.minimum, self.maximum))
+        else:
+            self.histogram, self.binEdges = np.array([array.size]), np.array([self.minimum, self.maximum])
+        self._cumulativeHistogram = np.cumsum(self.histogram)
+        # The reference keeps the same Python wrapper of the image data, compared by identity
+        self._imageData = imageData
+        self._modifiedTime = VolumeStatistics.getModifiedTime(imageData)
+
+    @staticmethod
+    def getModifiedTime(imageData):
+        return max(imageData.GetMTime(), imageData.GetPointData().GetScalars().GetMTime())
+
+    def isUpToDate(self, imageData):
+        return imageData is self._imageData and VolumeStatistics.getModifiedTime(imageData) == self._modifiedTime
+
+    def getPercentile(self, fraction):
+        """
+        Return the scalar value below which the input fraction of the voxels are, at the histogram bin precision
+        """
+        binIndex = int(np.searchsorted(self._cumulativeHistogram, fraction * self._cumulativeHistogram[-1]))
+        binIndex = min(binIndex, len(self.histogram) - 1)
+        return float((self.binEdges[binIndex] + self.binEdges[binIndex + 1]) / 2)
+
+    def getRobustRange(self, fraction):
+        """
+        Return the scalar range holding the central input fraction of the voxels
+        """
+        outsideFraction = (1 - fraction) / 2
+        return self.getPercentile(outsideFraction), self.getPercentile(1 - outsideFraction)
 
 
 class VolumeItem:
-    def __init__(self, volumeHierarchy: VolumeHierarchy, numberOfSlices, volumeNode=None):
+    """
+    Volume listed in the table with its rendering and segmentation nodes.
+    A DICOM item can be created from its header metadata only, its nodes are then created by setVolumeNode once its
+    pixel data is loaded. The segmentation node is only created when the item is first segmented.
+    The pixel data can be unloaded to free memory and set again later, a non empty segmentation and the rendering shift
+    value are kept in the meantime.
+    The volume rendering uses the shared volume property of the item preset until the item gets its own copy with
+    detachRenderingPreset. A downsampled interaction proxy of the volume can be rendered instead of the volume while
+    the user interacts with the views.
+    """
+
+    def __init__(self, volumeHierarchy: VolumeHierarchy, numberOfSlices, volumeNode=None, volumeName=None):
         self.volumeHierarchy = volumeHierarchy
         self.numberOfSlices = numberOfSlices
-        self.volumeNode = volumeNode if volumeNode else slicer.util.getNode(volumeHierarchy.volumeNodeID)
+        if not volumeNode and volumeHierarchy.volumeNodeID:
+            volumeNode = slicer.util.getNode(volumeHierarchy.volumeNodeID)
+        self.volumeName = volumeName if volumeName else volumeHierarchy.seriesDescription
+        self.volumeNode = None
+        self.volumeRenderingDisplayNode = None
+        self.renderingROINode = None
+        self.segmentationNode = None
+        self.renderingPresetName = None
+        self.ownRenderingPropertyNode = None
+        self.shiftRenderingValue = None
+        self.defaultShiftRenderingValue = None
+        self.interactionProxyNode = None
+        self.interactionProxyDisplayNode = None
+        self.statistics = None
+        if volumeNode:
+            self.setVolumeNode(volumeNode)
+
+    def __del__(self):
+        self.release()
+
+    def release(self):
+        """
+        Remove all the nodes of the item from the scene: volume, rendering, ROI and segmentation nodes with their
+        display and storage nodes, and the item own volume property. The shared preset volume properties are kept.
+        Return the number of bytes of the released volume pixel data. Releasing the item again does nothing.
+        """
+        freedBytes = self.getMemorySize()
+        self.unloadVolumeData()
+        SlicerUtils.removeNodeWithDependencies(self.segmentationNode)
+        if self.ownRenderingPropertyNode:
+            slicer.mrmlScene.RemoveNode(self.ownRenderingPropertyNode)
+        self.segmentationNode = None
+        self.ownRenderingPropertyNode = None
+        return freedBytes
+
+    def isLoaded(self):
+        return self.volumeNode is not None
+
+    def setVolumeNode(self, volumeNode):
+        """
+        Associate the loaded volume node to the item and create its rendering nodes.
+        When the item is reloaded, its existing segmentation and rendering shift value are kept.
+        """
+        self.volumeNode = volumeNode
         self.volumeName = self.volumeNode.GetName()
-        self.volumeRenderingDisplayNode = self.initializeRendering()
+        with getPipelineProfiler().measureStage(getVolumeIdentifier(self.volumeHierarchy), "initializeRendering"):
+            self.volumeRenderingDisplayNode = self.initializeRendering()
         self.volumeNode.SetDisplayVisibility(False)
-        self.segmentationNode = SlicerUtils.addNode("vtkMRMLSegmentationNode")
-        self.segmentationNode.SetName("Segmentation_" + self.volumeName)
-        self.shiftRenderingValue = (self.getMinScalarValue() + self.getMaxScalarValue()) / 2
+        if self.shiftRenderingValue is None:
+            self.updateDefaultShiftRenderingValue()
 
-    def __ne__(self, other):
-        return self.volumeName == other.volumeName
+    def getShiftRenderingRange(self):
+        """
+        Return the range of the rendering shift: the central voxel values (80% by default), to avoid full white or
+        transparent volumes
+        """
+        return self.getStatistics().getRobustRange(SlicerLiteSettings.DisplayScalarRange)
 
-    def __del__(self):
-        slicer.mrmlScene.RemoveNode(self.volumeNode)
-        slicer.mrmlScene.RemoveNode(self.segmentationNode)
+    def updateDefaultShiftRenderingValue(self):
+        """
+        Set the rendering shift to the center of its range, which is not clamped by the shift slider
+        """
+        minimum, maximum = self.getShiftRenderingRange()
+        self.defaultShiftRenderingValue = (minimum + maximum) / 2
+        self.shiftRenderingValue = self.defaultShiftRenderingValue
+
+    def setFullResolutionLoaded(self, proxyVolumeData=None):
+        """
+        Update the item once the proxy voxels of its volume node are replaced by the full resolution ones.
+        The rendering shift is computed again from the new voxels unless the user changed it, and the proxy voxels are
+        kept as interaction proxy.
+        """
+        if self.shiftRenderingValue == self.defaultShiftRenderingValue:
+            self.updateDefaultShiftRenderingValue()
+        if proxyVolumeData is not None:
+            self.setInteractionProxy(proxyVolumeData)
+
+    def unloadVolumeData(self):
+        """
+        Remove the volume node with its display, rendering and storage nodes from the scene to free their memory.
+        A non empty segmentation, the volume property and the rendering shift value are kept until the item is reloaded.
+        """
+        if not self.isLoaded():
+            return
+        self.removeSegmentationNodeIfEmpty()
+        self.removeInteractionProxy()
+        # The cropping ROI may also have been created by the volume rendering module
+        roiNode = self.volumeRenderingDisplayNode.GetROINode() if self.volumeRenderingDisplayNode else None
+        # The volume rendering display node is one of the display nodes of the volume
+        SlicerUtils.removeNodeWithDependencies(self.volumeNode)
+        SlicerUtils.removeNodeWithDependencies(roiNode or self.renderingROINode)
+        self.volumeRenderingDisplayNode = None
+        self.renderingROINode = None
+        self.volumeNode = None
+        self.statistics = None
+        if self.volumeHierarchy.seriesUID:
+            self.volumeHierarchy.volumeNodeID = ""
+
+    def getOrCreateSegmentationNode(self):
+        """
+        Return the segmentation node of the item, created at its first use
+        """
+        if not self.segmentationNode:
+            with getPipelineProfiler().measureStage(getVolumeIdentifier(self.volumeHierarchy), "createSegmentation"):
+                self.segmentationNode = SlicerUtils.addNode("vtkMRMLSegmentationNode")
+                self.segmentationNode.SetName("Segmentation_" + self.volumeName)
+        return self.segmentationNode
+
+    def hasSegments(self):
+        return bool(self.segmentationNode) and self.segmentationNode.GetSegmentation().GetNumberOfSegments() > 0
+
+    def removeSegmentationNodeIfEmpty(self):
+        """
+        Remove the segmentation node if no segment was added to it, it is created again at its next use
+        """
+        if not self.segmentationNode or self.hasSegments():
+            return
+        SlicerUtils.removeNodeWithDependencies(self.segmentationNode)
+        self.segmentationNode = None
+
+    def getMemorySize(self):
+        """
+        Return the memory used by the volume pixel data in bytes
+        """
+        if not self.isLoaded() or not self.volumeNode.GetImageData():
+            return 0
+        return self.volumeNode.GetImageData().GetActualMemorySize() * 1024
+
+    def getStatistics(self) -> VolumeStatistics:
+        """
+        Return the scalar statistics of the volume node, computed again only if its image data changed
+        """
+        imageData = self.volumeNode.GetImageData()
+        if self.statistics is None or not self.statistics.isUpToDate(imageData):
+            self.statistics = VolumeStatistics(imageData)
+        return self.statistics
 
     def getMinScalarValue(self):
         """
         Return the minimum scalar value of the volume node
         """
-        return self.volumeNode.GetImageData().GetPointData().GetScalars().GetRange()[0]
+        return self.getStatistics().minimum
 
     def getMaxScalarValue(self):
         """
         Return the maximum scalar value of the volume node
         """
-        return self.volumeNode.GetImageData().GetPointData().GetScalars().GetRange()[1]
+        return self.getStatistics().maximum
 
     def isDicomVolumeItem(self):
-        return self.volumeHierarchy.volumeNodeID != ""
+        return self.volumeHierarchy.seriesUID != ""
 
     def initializeRendering(self):
         volRenLogic = slicer.modules.volumerendering.logic()
         displayNode = volRenLogic.CreateDefaultVolumeRenderingNodes(self.volumeNode)
         displayNode.SetVisibility(False)
-        renderingPreset = SlicerUtils.createRenderingPreset()
-        displayNode.GetVolumePropertyNode().Copy(renderingPreset)
+        if self.renderingPresetName is None:
+            modality = SlicerUtils.getSeriesModality(self.volumeHierarchy.seriesUID)
+            self.renderingPresetName = getRenderingPresetRegistry().getPresetNameForModality(modality)
+
+        # Replace the default volume property by the shared preset one, or by the item copy after a reload
+        defaultPropertyNode = displayNode.GetVolumePropertyNode()
+        propertyNode = self.ownRenderingPropertyNode
+        if not propertyNode:
+            propertyNode = getRenderingPresetRegistry().getSharedPropertyNode(self.renderingPresetName)
+        displayNode.SetAndObserveVolumePropertyNodeID(propertyNode.GetID())
+        slicer.mrmlScene.RemoveNode(defaultPropertyNode)
+        if SlicerLiteSettings.ForegroundCropping:
+            self.initializeRenderingROI(displayNode)
         return displayNode
 
+    def initializeRenderingROI(self, displayNode):
+        """
+        Restrict the volume rendering to the foreground box of the volume, unless its voxels are already cropped to it.
+        The ROI is aligned with the RAS axes and encloses the foreground box of oblique volumes.
+        """
+        with getPipelineProfiler().measureStage(getVolumeIdentifier(self.volumeHierarchy), "foregroundROI"):
+            array = slicer.util.arrayFromVolume(self.volumeNode)
+            box = getForegroundBox(array, SlicerLiteSettings.ForegroundThresholdFraction)
+        if box is None or box == ((0, 0, 0), array.shape[2::-1]):
+            return
+
+        ijkToRas = vtk.vtkMatrix4x4()
+        self.volumeNode.GetIJKToRASMatrix(ijkToRas)
+        # Voxel centers are at integer indices, the box borders are half a voxel away
+        (startI, startJ, startK), (endI, endJ, endK) = box
+        corners = np.array([ijkToRas.MultiplyPoint((i - 0.5, j - 0.5, k - 0.5, 1))[:3]
+                            for i in (startI, endI) for j in (startJ, endJ) for k in (startK, endK)])
+        if not self.renderingROINode:
+            self.renderingROINode = slicer.modules.volumerendering.logic().CreateROINode(displayNode)
+            self.renderingROINode.SetName("ROI_" + self.volumeName)
+            self.renderingROINode.SetDisplayVisibility(False)
+        else:
+            displayNode.SetAndObserveROINodeID(self.renderingROINode.GetID())
+        self.renderingROINode.SetXYZ(((corners.min(axis=0) + corners.max(axis=0)) / 2).tolist())
+        self.renderingROINode.SetRadiusXYZ(((corners.max(axis=0) - corners.min(axis=0)) / 2).tolist())
+        displayNode.SetCroppingEnabled(True)
+
+    def setRenderingPreset(self, presetName):
+        """
+        Render the volume with the shared property of the input preset, discarding the item own rendering changes
+        """
+        self.renderingPresetName = presetName
+        if self.ownRenderingPropertyNode:
+            slicer.mrmlScene.RemoveNode(self.ownRenderingPropertyNode)
+            self.ownRenderingPropertyNode = None
+        if self.isLoaded():
+            propertyNode = getRenderingPresetRegistry().getSharedPropertyNode(presetName)
+            self.volumeRenderingDisplayNode.SetAndObserveVolumePropertyNodeID(propertyNode.GetID())
+
+    def detachRenderingPreset(self) -> bool:
+        """
+        Give the item its own copy of its preset volume property, so that its rendering can be changed without
+        modifying the other items. Return False if the item does not use a shared preset volume property.
+        """
+        if not self.isLoaded():
+            return False
+        propertyNode = self.volumeRenderingDisplayNode.GetVolumePropertyNode()
+        if not getRenderingPresetRegistry().isSharedPropertyNode(propertyNode):
+            return False
+        self.ownRenderingPropertyNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLVolumePropertyNode")
+        self.ownRenderingPropertyNode.Copy(propertyNode)
+        self.ownRenderingPropertyNode.SetName("VolumeProperty_" + self.volumeName)
+        self.volumeRenderingDisplayNode.SetAndObserveVolumePropertyNodeID(self.ownRenderingPropertyNode.GetID())
+        return True
+
+    def setInteractionProxy(self, proxyVolumeData):
+        """
+        Create a hidden volume node with the downsampled proxy voxels, rendered instead of the volume during the
+        interactions. It is not created if the proxy is not smaller than the volume.
+        """
+        self.removeInteractionProxy()
+        if not self.isLoaded() or proxyVolumeData.getVoxelCount() >= self.volumeNode.GetImageData().GetNumberOfPoints():
+            return
+        self.interactionProxyNode = SlicerUtils.addVolumeNodeFromVolumeData(proxyVolumeData,
+                                                                            "InteractionProxy_" + self.volumeName)
+        self.interactionProxyNode.SetHideFromEditors(True)
+        self.interactionProxyNode.SetSaveWithScene(False)
+        self.interactionProxyNode.SetDisplayVisibility(False)
+        displayNode = slicer.modules.volumerendering.logic().CreateDefaultVolumeRenderingNodes(
+            self.interactionProxyNode)
+        # The volume property and ROI of the volume are used, they are set when the proxy is shown
+        slicer.mrmlScene.RemoveNode(displayNode.GetVolumePropertyNode())
+        displayNode.SetSaveWithScene(False)
+        displayNode.SetVisibility(False)
+        self.interactionProxyDisplayNode = displayNode
+
+    def removeInteractionProxy(self):
+        self.setInteractionProxyVisible(False)
+        SlicerUtils.removeNodeWithDependencies(self.interactionProxyNode)
+        self.interactionProxyNode = None
+        self.interactionProxyDisplayNode = None
+
+    def setInteractionProxyVisible(self, visible):
+        """
+        Render the interaction proxy instead of the volume, if the volume is rendered and has an interaction proxy
+        """
+        proxyDisplayNode = self.interactionProxyDisplayNode
+        if not proxyDisplayNode or not self.isLoaded() or bool(proxyDisplayNode.GetVisibility()) == visible:
+            return
+        if visible and not self.volumeRenderingDisplayNode.GetVisibility():
+            return
+        if visible:
+            # The item volume property and cropping may have changed since the last interaction
+            proxyDisplayNode.SetAndObserveVolumePropertyNodeID(
+                self.volumeRenderingDisplayNode.GetVolumePropertyNodeID())
+            proxyDisplayNode.SetAndObserveROINodeID(self.volumeRenderingDisplayNode.GetROINodeID())
+            proxyDisplayNode.SetCroppingEnabled(self.volumeRenderingDisplayNode.GetCroppingEnabled())
+        with slicer.util.RenderBlocker():
+            proxyDisplayNode.SetVisibility(visible)
+            self.volumeRenderingDisplayNode.SetVisibility(not visible)
+
     def getVisibility(self) -> bool:
-        return self.volumeNode.GetDisplayNode().GetVisibility()
+        return self.isLoaded() and self.volumeNode.GetDisplayNode().GetVisibility()
 
     def setVisibility(self, visible):
+        if not self.isLoaded():
+            return
+        self.setInteractionProxyVisible(False)
         self.volumeNode.SetDisplayVisibility(visible)
-        self.segmentationNode.SetDisplayVisibility(visible)
+        if self.segmentationNode:
+            self.segmentationNode.SetDisplayVisibility(visible)
         if visible:
-            SlicerUtils.showVolumeAsForegroundInSlices(self.volumeNode.GetID())
+            SlicerUtils.showVolumeInSlices(self.volumeNode.GetID())
             SlicerUtils.resetSliceViews()
             SlicerUtils.resetOriginalSlicesOrientations()
-            slicer.util.resetThreeDViews()
+            SlicerUtils.resetThreeDViews()
 
     def toggleVisibility(self):
         self.setVisibility(not self.getVisibility())
 
 
-class VolumeItemModel(qt.QStandardItemModel):
+class VolumeItemRow:
+    """
+    Row of the VolumeItemModel: the listed VolumeItem and its display text
+    """
+    __slots__ = ("volumeItem", "displayText")
+
+    def __init__(self, volumeItem: VolumeItem):
+        self.volumeItem = volumeItem
+        self.displayText = volumeItem.volumeName + "(" + str(volumeItem.numberOfSlices) + ")"
+
+
+class RowPositionIndex:
+    """
+    Rows of the entries of a list where entries are appended at the end and removed anywhere, without renumbering the
+    following entries on removal.
+    Each entry keeps the position at which it was appended, its row is the number of remaining entries appended before
+    it, counted by a Fenwick tree in O(log n).
+    """
+
+    def __init__(self):
+        # Fenwick tree of the presence of the appended entries, 1-based
+        self._tree = [0]
+
+    def append(self) -> int:
+        """
+        Add an entry at the end and return its append position
+        """
+        position = len(self._tree)
+        lowestBit = position & -position
+        self._tree.append(1 + self._countBefore(position - 1) - self._countBefore(position - lowestBit))
+        return position - 1
+
+    def remove(self, appendPosition):
+        position = appendPosition + 1
+        while position < len(self._tree):
+            self._tree[position] -= 1
+            position += position & -position
+
+    def getRow(self, appendPosition) -> int:
+        return self._countBefore(appendPosition)
+
+    def _countBefore(self, position):
+        # Number of entries present among the first position appended ones
+        count = 0
+        while position > 0:
+            count += self._tree[position]
+            position -= position & -position
+        return count
+
+
+class VolumeItemModel(qt.QAbstractTableModel):
+    """
+    Table of the listed VolumeItems, with their name in the first column and their buttons, painted by the
+    delegates, in the two others.
+    Rows are only stored as VolumeItemRows: the view queries the data of the visible rows only, so that thousands of
+    series can be listed without allocating Qt items or widgets for each of them.
+    """
     ItemUserRole = qt.Qt.UserRole + 1
+    ColumnCount = 3
 
     def __init__(self, parent=None):
         super(VolumeItemModel, self).__init__(parent)
+        self._rows = []
+        # Append positions of the items by item identity and by series UID for the DICOM items, their rows are given
+        # by the position index so that removals don't renumber the following items
+        self._positionForItemId = {}
+        self._positionForSeriesUID = {}
+        self._positionIndex = RowPositionIndex()
+        self._visibleVolumeItem = None
+        self._currentVolumeItem = None
+
+    def rowCount(self, parent=qt.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=qt.QModelIndex()):
+        return 0 if parent.isValid() else VolumeItemModel.ColumnCount
+
+    def data(self, index, role=qt.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == qt.Qt.DisplayRole and index.column() == 0:
+            return row.displayText
+        if role == VolumeItemModel.ItemUserRole:
+            return row.volumeItem
+        return None
 
     def addItem(self, item: VolumeItem):
-        def createItem(i):
-            displayText = item.volumeName + "(" + str(item.numberOfSlices) + ")" if i == 0 else ""
-            newItem = qt.QStandardItem(displayText)
-            newItem.setData(item, VolumeItemModel.ItemUserRole)
-            return newItem
+        rowId = len(self._rows)
+        self.beginInsertRows(qt.QModelIndex(), rowId, rowId)
+        self._rows.append(VolumeItemRow(item))
+        position = self._positionIndex.append()
+        self._positionForItemId[id(item)] = position
+        if item.isDicomVolumeItem():
+            self._positionForSeriesUID[item.volumeHierarchy.seriesUID] = position
+        self.endInsertRows()
+        return self.index(rowId, 0)
 
-        self.appendRow([createItem(i) for i in range(3)])
-        return self.index(self.rowCount(), self.columnCount())
+    def removeRows(self, row, count, parent=qt.QModelIndex()):
+        if parent.isValid() or row < 0 or count <= 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(qt.QModelIndex(), row, row + count - 1)
+        for removedRow in self._rows[row:row + count]:
+            self._positionIndex.remove(self._positionForItemId.pop(id(removedRow.volumeItem)))
+            if removedRow.volumeItem.isDicomVolumeItem():
+                self._positionForSeriesUID.pop(removedRow.volumeItem.volumeHierarchy.seriesUID, None)
+            if removedRow.volumeItem is self._visibleVolumeItem:
+                self._visibleVolumeItem = None
+            if removedRow.volumeItem is self._currentVolumeItem:
+                self._currentVolumeItem = None
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def removeRow(self, row, parent=qt.QModelIndex()):
+        return self.removeRows(row, 1, parent)
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._positionForItemId.clear()
+        self._positionForSeriesUID.clear()
+        self._positionIndex = RowPositionIndex()
+        self._visibleVolumeItem = None
+        self._currentVolumeItem = None
+        self.endResetModel()
 
     def getVolumeItemFromId(self, volumeId):
         """
         Get the VolumeItem at the id row position.
         If not found, then return None
         """
-        if volumeId < self.rowCount():
-            return self.item(volumeId).data(VolumeItemModel.ItemUserRole)
+        if 0 <= volumeId < len(self._rows):
+            return self._rows[volumeId].volumeItem
         return None
 
     def getVolumeIdFromVolumeItem(self, volumeItem: VolumeItem):
@@ -104,19 +521,58 @@ class VolumeItemModel(qt.QStandardItemModel):
         Get the index of the input volumeItem in the model list
         If not found, return -1
         """
-        for i in range(self.rowCount()):
-            if self.getVolumeItemFromId(i) == volumeItem:
-                return i
-        return -1
+        position = self._positionForItemId.get(id(volumeItem))
+        return -1 if position is None else self._positionIndex.getRow(position)
+
+    def getVolumeIdFromSeriesUID(self, seriesUID: str):
+        """
+        Get the index of the DICOM item of the input series in the model list
+        If not found, return -1
+        """
+        position = self._positionForSeriesUID.get(seriesUID)
+        return -1 if position is None else self._positionIndex.getRow(position)
+
+    def getVolumeItemFromSeriesUID(self, seriesUID: str):
+        """
+        Get the DICOM VolumeItem of the input series.
+        If not found, then return None
+        """
+        return self.getVolumeItemFromId(self.getVolumeIdFromSeriesUID(seriesUID))
+
+    def getVisibleVolumeItem(self):
+        """
+        Return the visible VolumeItem, or None if all the volumes are hidden
+        """
+        return self._visibleVolumeItem
+
+    def getCurrentVolumeId(self):
+        """
+        Return the row of the current item, whose buttons are displayed, or -1 if there is no current item
+        """
+        return self.getVolumeIdFromVolumeItem(self._currentVolumeItem)
+
+    def setCurrentVolumeId(self, volumeId):
+        previousCurrentRow = self.getCurrentVolumeId()
+        self._currentVolumeItem = self.getVolumeItemFromId(volumeId)
+        self._emitRowsChanged({previousCurrentRow, volumeId})
+
+    def _emitRowsChanged(self, rows):
+        for row in rows:
+            if 0 <= row < len(self._rows):
+                self.dataChanged.emit(self.index(row, 0), self.index(row, VolumeItemModel.ColumnCount - 1))
 
     def toggleVolumeVisibility(self, itemId):
-        self.item(itemId).data(VolumeItemModel.ItemUserRole).toggleVisibility()
-        currentItemVisibility = self.item(itemId).data(VolumeItemModel.ItemUserRole).getVisibility()
-        if currentItemVisibility:
-            # Hide all other volumes to keep one visible volume
-            for rowID in range(self.rowCount()):
-                if rowID == itemId:
-                    continue
-                self.item(rowID).data(VolumeItemModel.ItemUserRole).setVisibility(False)
-        # Allow to notify the view that model as changed, so that the view can repaint itself
-        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+        volumeItem = self.getVolumeItemFromId(itemId)
+        volumeItem.toggleVisibility()
+        previousVisibleRow = self.getVolumeIdFromVolumeItem(self._visibleVolumeItem)
+        changedRows = {itemId}
+        if volumeItem.getVisibility():
+            # Hide the previously visible volume to keep one visible volume
+            if 0 <= previousVisibleRow != itemId:
+                self._visibleVolumeItem.setVisibility(False)
+                changedRows.add(previousVisibleRow)
+            self._visibleVolumeItem = volumeItem
+        elif previousVisibleRow == itemId:
+            self._visibleVolumeItem = None
+        # Only notify the view of the changed rows, so that it doesn't repaint the whole table
+        self._emitRowsChanged(changedRows)
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import slicer
+import vtk
+
+_renderingPresetRegistry = None
+
+
+@dataclass
+class RenderingPreset:
+    """
+    Volume rendering preset built from a Volume Rendering module preset, with an optional scalar opacity override
+    """
+    basePresetName: str
+    scalarOpacity: Optional[str] = None
+
+
+class RenderingPresetRegistry:
+    """
+    Volume property nodes of the rendering presets, built once and shared between the VolumeItems.
+    Items use the shared node of their preset until the user changes their rendering, they then get their own copy.
+    """
+    Presets = {
+        "CT-Bone": RenderingPreset("CT-Cropped-Volume-Bone", "10 -2048 0 -451 0 -450 0 1050 0.05 3661 0.1"),
+        "CT-Soft-Tissue": RenderingPreset("CT-Soft-Tissue"),
+        "MR-Default": RenderingPreset("MR-Default"),
+        "US-Fetal": RenderingPreset("US-Fetal"),
+    }
+    # Preset used for each DICOM modality, the other volumes use the default preset
+    ModalityPresetNames = {"CT": "CT-Bone", "MR": "MR-Default", "US": "US-Fetal"}
+    DefaultPresetName = "CT-Bone"
+
+    def __init__(self):
+        self._propertyNodes = {}
+
+    def getPresetNames(self):
+        return list(RenderingPresetRegistry.Presets)
+
+    def getPresetNameForModality(self, modality):
+        return RenderingPresetRegistry.ModalityPresetNames.get(modality, RenderingPresetRegistry.DefaultPresetName)
+
+    def getSharedPropertyNode(self, presetName):
+        """
+        Return the shared volume property node of the preset, created at its first use or after a scene clear.
+        The node is saved with the scene since the volume rendering display nodes of the items reference it.
+        """
+        propertyNode = self._propertyNodes.get(presetName)
+        if propertyNode is not None and slicer.mrmlScene.IsNodePresent(propertyNode):
+            return propertyNode
+
+        propertyNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLVolumePropertyNode")
+        self._applyPreset(propertyNode, presetName)
+        propertyNode.SetName(slicer.mrmlScene.GenerateUniqueName("SlicerLite_" + presetName))
+        self._propertyNodes[presetName] = propertyNode
+        return propertyNode
+
+    def resetSharedPropertyNode(self, presetName):
+        """
+        Restore the transfer functions of the shared property node of the preset, if it was modified
+        """
+        propertyNode = self._propertyNodes.get(presetName)
+        if propertyNode is None or not slicer.mrmlScene.IsNodePresent(propertyNode):
+            return
+        name = propertyNode.GetName()
+        self._applyPreset(propertyNode, presetName)
+        propertyNode.SetName(name)
+
+    def isSharedPropertyNode(self, propertyNode):
+        return any(propertyNode is sharedNode for sharedNode in self._propertyNodes.values())
+
+    @staticmethod
+    def _applyPreset(propertyNode, presetName):
+        preset = RenderingPresetRegistry.Presets[presetName]
+        propertyNode.Copy(slicer.modules.volumerendering.logic().GetPresetByName(preset.basePresetName))
+        if preset.scalarOpacity:
+            scalarOpacity = vtk.vtkPiecewiseFunction()
+            propertyNode.GetPiecewiseFunctionFromString(preset.scalarOpacity, scalarOpacity)
+            propertyNode.SetScalarOpacity(scalarOpacity)
+        propertyNode.SetHideFromEditors(True)
+        propertyNode.SetSaveWithScene(True)
+
+
+def getRenderingPresetRegistry() -> RenderingPresetRegistry:
+    global _renderingPresetRegistry
+    if _renderingPresetRegistry is None:
+        _renderingPresetRegistry = RenderingPresetRegistry()
+    return _renderingPresetRegistry
@@ -1,5 +1,7 @@
 import qt
 
+from SlicerLiteLib.Utils import Signal
+
 
 class IterableAttributeMeta(type):
     """
@@ -22,44 +24,118 @@ class DefaultSettings(metaclass=IterableAttributeMeta):
     Each setting will be accessible through SlicerLite/{parameter_name}
     """
     LastOpenedDirectory = ""
+    # Fraction of the voxels, centered on the median, whose values are reachable with the rendering shift slider
     DisplayScalarRange = 0.8
+    AsynchronousLoading = True
+    # Number of series read in parallel, 0 uses the number of CPU cores
+    LoadingWorkerCount = 0
+    # List DICOM series from their header and only load their pixel data when they are first selected
+    LazySeriesLoading = False
+    # Memory allowed for the loaded volumes pixel data before unloading the least recently viewed ones, 0 is unlimited
+    MemoryBudgetMB = 0
+    # Keep the DICOM database and an index of its files between sessions to skip re-indexing unchanged files
+    PersistentDicomIndex = False
+    DicomIndexCacheMaxFileCount = 200000
+    # Disk quota of the decoded volumes cache used to re-open volumes without decoding them, 0 disables the cache
+    DecodedVolumeCacheQuotaMB = 0
+    # Display a downsampled proxy of the volumes loaded on selection until their full resolution is read
+    ProgressiveLoading = True
+    ProgressiveProxyMaxDimension = 128
+    # Restrict the volume rendering to the bounding box of the foreground voxels, computed after load
+    ForegroundCropping = False
+    # Also crop the loaded voxels to the foreground bounding box, to reduce the memory of the volumes
+    ForegroundCropStoredVolumes = False
+    # Foreground threshold, as a fraction between the 0.5 and 99.5 percentiles of the voxel values
+    ForegroundThresholdFraction = 0.15
+    # Record the time, bytes read and memory of each stage of the load pipeline, saved as a JSON report from the UI
+    PipelineInstrumentation = False
 
 
 class SettingsMeta(type):
     """
     Meta type for the application settings.
-    Initializes the .ini settings if they are not present and converts the values to float by default.
+    Initializes the .ini settings if they are not present and reads them once, converted to their default type, into an
+    in memory cache. Changed settings are notified by settingChangedSignal(name, value) and written back to the .ini
+    file together by a deferred sync.
     """
+    # Delay during which the changed settings are accumulated before being written
+    SyncDelayMs = 1000
 
     def __new__(mcs, *args, **kwargs):
         x = super().__new__(mcs, *args, **kwargs)
-        for k in DefaultSettings:
-            if not qt.QSettings().contains(f"SlicerLite/{k}"):
-                qt.QSettings().setValue(f"SlicerLite/{k}", DefaultSettings[k])
+        type.__setattr__(x, "settingChangedSignal", Signal("str", "object"))
+        type.__setattr__(x, "_pendingWrites", {})
+        type.__setattr__(x, "_isSyncScheduled", False)
+        x.reload()
+        app = qt.QCoreApplication.instance()
+        if app is not None:
+            app.connect("aboutToQuit()", x.sync)
         return x
 
     def __dir__(self):
         return [k for k in DefaultSettings]
 
-    def __getattr__(cls, attr):
-        if attr not in DefaultSettings:
-            raise AttributeError(f"Class doesn't contain {attr}")
-        value = qt.QSettings().value(f"SlicerLite/{attr}")
+    @staticmethod
+    def _convert(attr, value):
         try:
             defaultType = type(getattr(DefaultSettings, attr))
+            if defaultType is bool:
+                # .ini backend stores booleans as "true" / "false" strings
+                return str(value).lower() in ("true", "1")
             return defaultType(value)
         except ValueError:
             return value
 
+    def reload(cls):
+        """
+        Read again all the settings from the .ini file, writing the default value of the missing ones
+        """
+        settings = qt.QSettings()
+        values = {}
+        for k in DefaultSettings:
+            if not settings.contains(f"SlicerLite/{k}"):
+                settings.setValue(f"SlicerLite/{k}", DefaultSettings[k])
+            values[k] = cls._convert(k, settings.value(f"SlicerLite/{k}"))
+        values.update(cls._pendingWrites)
+        type.__setattr__(cls, "_values", values)
+
+    def sync(cls):
+        """
+        Write the changed settings to the .ini file
+        """
+        type.__setattr__(cls, "_isSyncScheduled", False)
+        if not cls._pendingWrites:
+            return
+        settings = qt.QSettings()
+        for k, value in cls._pendingWrites.items():
+            settings.setValue(f"SlicerLite/{k}", value)
+        settings.sync()
+        cls._pendingWrites.clear()
+
+    def __getattr__(cls, attr):
+        if attr not in DefaultSettings:
+            raise AttributeError(f"Class doesn't contain {attr}")
+        return cls._values[attr]
+
     def __setattr__(self, key, value):
         if key not in DefaultSettings:
             raise AttributeError(f"Class doesn't contain {key}")
-        qt.QSettings().setValue(f"SlicerLite/{key}", value)
+        value = self._convert(key, value)
+        if self._values[key] == value:
+            return
+        self._values[key] = value
+        self._pendingWrites[key] = value
+        if not self._isSyncScheduled:
+            type.__setattr__(self, "_isSyncScheduled", True)
+            qt.QTimer.singleShot(SettingsMeta.SyncDelayMs, self.sync)
+        self.settingChangedSignal.emit(key, value)
 
 
 class SlicerLiteSettings(metaclass=SettingsMeta):
     """
     Class managing the settings of the application.
     The settings are read from Settings/DefaultSettings.ini file.
+    Use SlicerLiteSettings.settingChangedSignal.connect to be notified of the changes and SlicerLiteSettings.sync() to
+    write them immediately.
     """
     pass
@@ -1,37 +1,73 @@
+import logging
+from typing import List
+
 import qt
 import slicer
 
 from SlicerLiteLib import Delegates, DataLoader, EventFilters, UIUtils, Settings, SlicerUtils, Model, SlicerLiteSettings, \
-getNumberOfDicomFilesFromVolumeHierarchy
+getNumberOfDicomFilesFromVolumeHierarchy, loadVolume, VolumeItemMemoryBudget, getPipelineProfiler, \
+getVolumeIdentifier, getRenderingPresetRegistry
 
 
 
 
 class SlicerLiteModuleWidget(qt.QWidget):
+    # Interval of the rendering shift updates while dragging the shift slider, rendered at reduced quality
+    ShiftInteractiveUpdateIntervalMs = 50
+    ShiftInteractiveExpectedFPS = 15
+
     def __init__(self, parent=None):
         super(SlicerLiteModuleWidget, self).__init__(parent)
         qt.QVBoxLayout(self)
         self.settings = qt.QSettings()
         self.lastSelectedRowIndex = -1
 
+        # The segment editor and the volume rendering module GUI are created at their first use
         self.segmentEditorWidget = None
         self.segmentEditorNode = None
+        self.segmentEditorContainer = None
+        self.segmentationCollapsibleButton = None
+        # Item whose segmentation is edited, the editor is only bound while the Segmentation section is expanded
+        self.segmentEditorVolumeItem = None
         self.renderingModule = None
         self.shiftSliderWidget = None
+        self.shiftSliderContainer = None
+        self.shiftUpdateTimer = None
+        self.isShiftSliderDragged = False
 
         self.dataLoader = DataLoader()
+        self.loadJob = None
+        self.loadJobLastAddedItem = None
+        self.loadProgressWidget = None
+        self.loadProgressBar = None
+        # Progressive loads of the items being loaded on selection, indexed by the id of their VolumeHierarchy
+        self.progressiveLoads = {}
+        # Item to set as current once its proxy is loaded, unless another item is selected meanwhile
+        self.pendingCurrentVolumeItem = None
+        self.memoryBudget = VolumeItemMemoryBudget()
         self.itemTableModel = Model.VolumeItemModel()
         self.itemTableView = qt.QTableView()
         self.deleteButtonItemDelegate = Delegates.DeleteButtonItemDelegate()
         self.dicomTagsButtonItemDelegate = Delegates.DicomMetadataButtonItemDelegate()
+        self.deleteButtonItemDelegate.itemDeletedSignal.connect(self.releaseVolumeItem)
+        self.deleteButtonItemDelegate.modelDeletedSignal.connect(self.memoryBudget.volumeDeleted)
         self.deleteButtonItemDelegate.modelDeletedSignal.connect(self.onDeleteVolumeItem)
         self.deleteButtonItemDelegate.modelDeletedSignal.connect(self.dataLoader.volumeDeleted)
 
         self.toolbarVisibilityButton = SlicerUtils.getToolBarVisibilityButton()
 
         # Setup event filter
-        self.filter = EventFilters.DragAndDropEventFilter(slicer.util.mainWindow(), self.loadInputData)
-        slicer.util.mainWindow().installEventFilter(self.filter)
+        self.filter = EventFilters.DragAndDropEventFilter(slicer.util.mainWindow(), self.loadInputPaths)
+        # No main window when Slicer runs headless, with --no-main-window
+        if slicer.util.mainWindow():
+            slicer.util.mainWindow().installEventFilter(self.filter)
+        # Item whose interaction proxy is rendered during the current interaction with the 3D views
+        self.interactionVolumeItem = None
+        self.viewInteractionObserver = EventFilters.ThreeDViewInteractionObserver(self.onViewInteractionStarted,
+                                                                                  self.onViewInteractionEnded)
+        self.viewInteractionObserver.observeViews()
+        if SlicerUtils.hasViews():
+            slicer.app.layoutManager().connect("layoutChanged(int)", self.onLayoutChanged)
 
         self.setupUI()
 
@@ -85,35 +121,144 @@ class SlicerLiteModuleWidget(qt.QWidget):
         layoutLoadVolumes = qt.QHBoxLayout()
         layoutLoadVolumes.addWidget(UIUtils.createButton("Load DICOM", callback=self.onClickLoadDicomVolume))
         layoutLoadVolumes.addWidget(UIUtils.createButton("Load volume", callback=self.onClickLoadVolume))
+        if SlicerLiteSettings.PipelineInstrumentation:
+            layoutLoadVolumes.addWidget(UIUtils.createButton("Save timing report",
+                                                             callback=self.onClickSaveTimingReport))
+
+        # Progress of the asynchronous loading, only visible while loading
+        self.loadProgressBar = qt.QProgressBar()
+        self.loadProgressWidget = qt.QWidget()
+        layoutLoadProgress = qt.QHBoxLayout(self.loadProgressWidget)
+        layoutLoadProgress.setContentsMargins(0, 0, 0, 0)
+        layoutLoadProgress.addWidget(self.loadProgressBar)
+        layoutLoadProgress.addWidget(UIUtils.createButton("Cancel", callback=self.onClickCancelLoad))
+        self.loadProgressWidget.setVisible(False)
 
         self.layout().addLayout(layoutLoadVolumes)
+        self.layout().addWidget(self.loadProgressWidget)
         self.layout().addWidget(qt.QLabel("Loaded volumes:"))
         self.layout().addWidget(self.itemTableView)
 
     def setupRenderingLayout(self):
         """
-        Get and place shift rendering sliders for volume rendering
+        Place the row of the shift rendering slider, hidden until the slider is created by setupRenderingModule
+        """
+        self.shiftSliderContainer = qt.QWidget()
+        layout = qt.QHBoxLayout(self.shiftSliderContainer)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(qt.QLabel("Rendering shift:"))
+        self.shiftSliderContainer.setVisible(False)
+
+        self.layout().addWidget(self.shiftSliderContainer)
+
+    def setupRenderingModule(self):
+        """
+        Get the shift rendering slider from a volume rendering module GUI, created when a volume first becomes current
         """
+        if self.renderingModule is not None:
+            return
         self.renderingModule = slicer.util.getNewModuleGui(slicer.modules.volumerendering)
         self.shiftSliderWidget = slicer.util.findChild(self.renderingModule, "PresetOffsetSlider")
         self.shiftSliderWidget.setEnabled(False)
+        self.shiftSliderContainer.layout().addWidget(self.shiftSliderWidget)
+        self.shiftSliderContainer.setVisible(True)
+
+        # While dragging, the shift is applied at a limited rate by the timer instead of at each slider move
+        self.shiftSliderWidget.tracking = False
+        self.shiftUpdateTimer = qt.QTimer()
+        self.shiftUpdateTimer.setSingleShot(True)
+        self.shiftUpdateTimer.setInterval(SlicerLiteModuleWidget.ShiftInteractiveUpdateIntervalMs)
+        self.shiftUpdateTimer.timeout.connect(self.onShiftUpdateTimeout)
+        self.shiftSliderWidget.connect("sliderPressed()", self.onShiftSliderPressed)
+        self.shiftSliderWidget.connect("sliderMoved(double)", self.onShiftSliderMoved)
+        self.shiftSliderWidget.connect("sliderReleased()", self.onShiftSliderReleased)
+        self.shiftSliderWidget.connect("valueChanged(double)", self.onShiftSliderValueChanged)
+
+    def onShiftSliderPressed(self):
+        self.isShiftSliderDragged = True
+        self.detachCurrentRenderingPreset()
+        self.onViewInteractionStarted()
+        SlicerUtils.startInteractiveVolumeRendering(SlicerLiteModuleWidget.ShiftInteractiveExpectedFPS)
+
+    def onShiftSliderMoved(self, position):
+        if not self.shiftUpdateTimer.isActive():
+            self.shiftUpdateTimer.start()
+
+    def onShiftUpdateTimeout(self):
+        if self.isShiftSliderDragged:
+            self.shiftSliderWidget.setValue(self.shiftSliderWidget.sliderPosition)
+
+    def onShiftSliderReleased(self):
+        """
+        Apply the final shift at full rendering quality and commit it to the current item
+        """
+        self.shiftUpdateTimer.stop()
+        SlicerUtils.endInteractiveVolumeRendering()
+        self.onViewInteractionEnded()
+        self.shiftSliderWidget.setValue(self.shiftSliderWidget.sliderPosition)
+        self.isShiftSliderDragged = False
+        self.commitShiftRenderingValue()
+
+    def onShiftSliderValueChanged(self, value):
+        # Dragged values are committed once, when the slider is released
+        if not self.isShiftSliderDragged:
+            # Keyboard and wheel changes are applied by the rendering module before being notified here
+            self.detachCurrentRenderingPreset(isSharedPropertyModified=True)
+            self.commitShiftRenderingValue()
+
+    def detachCurrentRenderingPreset(self, isSharedPropertyModified=False):
+        """
+        Give the current item its own volume property before its first rendering change, so that the shift slider
+        does not modify the other items using the same preset
+        """
+        volumeItem = self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex)
+        if volumeItem and volumeItem.detachRenderingPreset() and isSharedPropertyModified:
+            getRenderingPresetRegistry().resetSharedPropertyNode(volumeItem.renderingPresetName)
 
-        layout = qt.QHBoxLayout()
-        layout.addWidget(qt.QLabel("Rendering shift:"))
-        layout.addWidget(self.shiftSliderWidget)
+    def commitShiftRenderingValue(self):
+        volumeItem = self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex)
+        if volumeItem:
+            volumeItem.shiftRenderingValue = self.shiftSliderWidget.value
+
+    def onLayoutChanged(self, layout):
+        self.viewInteractionObserver.observeViews()
 
-        self.layout().addLayout(layout)
+    def onViewInteractionStarted(self):
+        """
+        Render the interaction proxy of the current item, if it has one, until the end of the interaction
+        """
+        self.onViewInteractionEnded()
+        self.interactionVolumeItem = self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex)
+        if self.interactionVolumeItem:
+            self.interactionVolumeItem.setInteractionProxyVisible(True)
+
+    def onViewInteractionEnded(self):
+        if self.interactionVolumeItem:
+            self.interactionVolumeItem.setInteractionProxyVisible(False)
+        self.interactionVolumeItem = None
 
     def setupSegmentationLayout(self):
+        """
+        Place the Segmentation collapsible, whose segment editor is created when it is first expanded
+        """
+        self.segmentEditorContainer = qt.QWidget()
+        qt.QVBoxLayout(self.segmentEditorContainer).setContentsMargins(0, 0, 0, 0)
+        self.segmentationCollapsibleButton = UIUtils.wrapInCollapsibleButton(self.segmentEditorContainer,
+                                                                             "Segmentation")
+        self.segmentationCollapsibleButton.connect("contentsCollapsed(bool)", self.onSegmentationCollapsed)
+        self.layout().addWidget(self.segmentationCollapsibleButton)
+
+    def setupSegmentEditor(self):
         """
         Get and set the segmentation modules and simplify it
         """
+        if self.segmentEditorWidget is not None:
+            return
         self.segmentEditorWidget = slicer.qMRMLSegmentEditorWidget()
         self.segmentEditorWidget.setMRMLScene(slicer.mrmlScene)
         self.segmentEditorNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSegmentEditorNode")
         self.segmentEditorWidget.setMRMLSegmentEditorNode(self.segmentEditorNode)
-
-        self.layout().addWidget(UIUtils.wrapInCollapsibleButton(self.segmentEditorWidget, "Segmentation"))
+        self.segmentEditorContainer.layout().addWidget(self.segmentEditorWidget)
 
         # Define list of hidden widgets inside segment editor widget
         hiddenWidgetsNames = ["SourceVolumeNodeLabel", "SourceVolumeNodeComboBox",
@@ -132,6 +277,33 @@ class SlicerLiteModuleWidget(qt.QWidget):
     def rotateSliceViewsToSegmentation(self):
         self.segmentEditorWidget.rotateSliceViewsToSegmentation()
 
+    def onSegmentationCollapsed(self, isCollapsed):
+        if not isCollapsed:
+            self.setupSegmentEditor()
+            self.bindSegmentEditor(self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex))
+
+    def bindSegmentEditor(self, volumeItem: Model.VolumeItem):
+        """
+        Bind the segment editor to the item, creating its segmentation node at its first use.
+        The empty segmentation of the previously bound item is removed.
+        """
+        # The same item is bound again after a reload, its volume node has changed
+        isNewItem = volumeItem is not self.segmentEditorVolumeItem
+        if isNewItem and self.segmentEditorVolumeItem:
+            self.segmentEditorVolumeItem.removeSegmentationNodeIfEmpty()
+        self.segmentEditorVolumeItem = volumeItem
+        isLoaded = bool(volumeItem) and volumeItem.isLoaded()
+        self.segmentEditorWidget.setSegmentationNode(volumeItem.getOrCreateSegmentationNode() if isLoaded else None)
+        self.segmentEditorWidget.setSourceVolumeNode(volumeItem.volumeNode if isLoaded else None)
+        # Empty segmentations follow the volume geometry, the views are aligned when their first segment is added
+        if isNewItem and isLoaded and volumeItem.hasSegments():
+            self.rotateSliceViewsToSegmentation()
+
+    def unbindSegmentEditor(self):
+        self.segmentEditorVolumeItem = None
+        self.segmentEditorWidget.setSegmentationNode(None)
+        self.segmentEditorWidget.setSourceVolumeNode(None)
+
     def onClickLoadDicomVolume(self):
         """
         User choose directory where DICOM will be extracted
@@ -158,24 +330,55 @@ class SlicerLiteModuleWidget(qt.QWidget):
 
         self.loadInputData(volumePath)
 
+    def onClickSaveTimingReport(self):
+        """
+        User choose the JSON file where the load pipeline instrumentation report is written
+        """
+        reportPath = qt.QFileDialog.getSaveFileName(self, "Save timing report",
+                                                    Settings.SlicerLiteSettings.LastOpenedDirectory,
+                                                    "JSON (*.json)")
+        if not reportPath:
+            return
+        getPipelineProfiler().writeReport(reportPath)
+
     def loadInputData(self, inputPath: str):
         """
         Add and load the input dicom dir into the DICOM database
         directory_path: Path to the directory that contains dicom
         """
+        self.loadInputPaths([inputPath])
+
+    def loadInputPaths(self, inputPaths: List[str]):
+        """
+        Load the input DICOM directories and volume files together, with a single import of the DICOM directories and
+        a single switch of the current volume once everything is loaded
+        """
+        if not inputPaths:
+            return
+        lastInputPath = inputPaths[-1]
+        if qt.QFileInfo(lastInputPath).isDir():
+            Settings.SlicerLiteSettings.LastOpenedDirectory = lastInputPath
+        else:
+            Settings.SlicerLiteSettings.LastOpenedDirectory = qt.QFileInfo(lastInputPath).absolutePath()
+
+        if Settings.SlicerLiteSettings.AsynchronousLoading:
+            self.loadInputDataAsync(inputPaths)
+            return
+
         qt.QApplication.setOverrideCursor(qt.Qt.WaitCursor)
 
         loadedVolumesNodes = []
-        volumeNode = None
-
-        if qt.QFileInfo(inputPath).isDir():
-            Settings.SlicerLiteSettings.LastOpenedDirectory = inputPath
-            loadedVolumesNodes = self.dataLoader.loadDicomDirInDBAndExtractVolumesAsItems(
-                Settings.SlicerLiteSettings.LastOpenedDirectory)
-        else:
-            Settings.SlicerLiteSettings.LastOpenedDirectory = qt.QFileInfo(inputPath).absolutePath()
-            hierarchy, volumeNode = self.dataLoader.loadVolume(inputPath)
-            loadedVolumesNodes = [hierarchy]
+        dicomDirectoryPaths = [inputPath for inputPath in inputPaths if qt.QFileInfo(inputPath).isDir()]
+        if dicomDirectoryPaths:
+            loadedHierarchies = self.dataLoader.loadDicomDirInDBAndExtractVolumesAsItems(
+                dicomDirectoryPaths, SlicerLiteSettings.LazySeriesLoading)
+            # Series are named as in the asynchronous load
+            loadedVolumesNodes = [(hierarchy, None, SlicerUtils.getDicomSeriesNodeName(slicer.dicomDatabase,
+                                                                                       hierarchy.seriesUID))
+                                  for hierarchy in loadedHierarchies]
+        for inputPath in inputPaths:
+            if not qt.QFileInfo(inputPath).isDir():
+                loadedVolumesNodes.append((*loadVolume(inputPath), None))
 
         qt.QApplication.restoreOverrideCursor()
 
@@ -183,34 +386,173 @@ class SlicerLiteModuleWidget(qt.QWidget):
             return
 
         lastAddedItem = None
-        for volumeNodeHierarchy in loadedVolumesNodes:
-            nbDicomSlices = getNumberOfDicomFilesFromVolumeHierarchy(volumeNodeHierarchy)
-            lastAddedItem = Model.VolumeItem(volumeNodeHierarchy, nbDicomSlices, volumeNode)
-            index = self.itemTableModel.addItem(lastAddedItem)
-            self.itemTableView.closePersistentEditor(index)
+        for volumeNodeHierarchy, volumeNode, volumeName in loadedVolumesNodes:
+            lastAddedItem = self.addVolumeItem(volumeNodeHierarchy, volumeNode, volumeName)
+
+        self.selectLastAddedVolumeItem(lastAddedItem)
 
-        if lastAddedItem:
+    def loadInputDataAsync(self, inputPaths: List[str]):
+        """
+        Load the input DICOM directories and volume files in the background.
+        Items are added to the table as soon as their volume is loaded.
+        """
+        if self.loadJob and self.loadJob.isRunning():
+            slicer.util.warningDisplay("A loading is already in progress. Cancel it or wait for it to finish.")
+            return
+
+        self.loadJob = self.dataLoader.loadInputDataAsync(inputPaths, SlicerLiteSettings.LazySeriesLoading)
+        self.loadJob.progressSignal.connect(self.onLoadJobProgress)
+        self.loadJob.volumeLoadedSignal.connect(self.onLoadJobVolumeLoaded)
+        self.loadJob.seriesDiscoveredSignal.connect(self.onLoadJobSeriesDiscovered)
+        self.loadJob.finishedSignal.connect(self.onLoadJobFinished)
+        self.loadProgressBar.setValue(0)
+        self.loadProgressWidget.setVisible(True)
+
+    def onLoadJobProgress(self, nbDoneSteps, nbSteps):
+        self.loadProgressBar.setMaximum(max(nbSteps, 1))
+        self.loadProgressBar.setValue(nbDoneSteps)
+
+    def onLoadJobVolumeLoaded(self, volumeHierarchy, volumeNode):
+        self.loadJobLastAddedItem = self.addVolumeItem(volumeHierarchy, volumeNode)
+
+    def onLoadJobSeriesDiscovered(self, volumeHierarchy, volumeName):
+        self.loadJobLastAddedItem = self.addVolumeItem(volumeHierarchy, volumeName=volumeName)
+
+    def onLoadJobFinished(self, nbLoadedVolumes, wasCancelled):
+        self.loadProgressWidget.setVisible(False)
+        if self.loadJob.errorMessages:
+            slicer.util.errorDisplay("\n".join(self.loadJob.errorMessages))
+        elif nbLoadedVolumes == 0 and not wasCancelled:
+            slicer.util.warningDisplay("No volume has been found from DICOM directory or volume already added.")
+        self.selectLastAddedVolumeItem(self.loadJobLastAddedItem)
+        self.loadJobLastAddedItem = None
+
+    def onClickCancelLoad(self):
+        if self.loadJob:
+            self.loadJob.cancel()
+
+    def addVolumeItem(self, volumeHierarchy, volumeNode=None, volumeName=None) -> Model.VolumeItem:
+        """
+        Create the VolumeItem of a volume and add it at the end of the table.
+        DICOM series without volume node are listed from their header and loaded when first selected.
+        """
+        nbDicomSlices = getNumberOfDicomFilesFromVolumeHierarchy(volumeHierarchy)
+        with getPipelineProfiler().measureStage(getVolumeIdentifier(volumeHierarchy), "createItem"):
+            volumeItem = Model.VolumeItem(volumeHierarchy, nbDicomSlices, volumeNode, volumeName)
+        self.itemTableModel.addItem(volumeItem)
+        self.memoryBudget.touch(volumeItem)
+        self.memoryBudget.evictIfNeeded()
+        return volumeItem
+
+    def selectLastAddedVolumeItem(self, lastAddedItem):
+        # The item may have been deleted meanwhile, during an asynchronous load
+        lastAddedRowId = self.itemTableModel.getVolumeIdFromVolumeItem(lastAddedItem) if lastAddedItem else -1
+        if lastAddedRowId >= 0:
             self.itemTableView.clearSelection()
             self.setCurrentVolumeItem(lastAddedItem)
-            self.setCurrentSelectedLineOnTableView(self.itemTableModel.rowCount() - 1)
+            self.setCurrentSelectedLineOnTableView(lastAddedRowId)
+
+    def loadVolumeItemData(self, volumeItem: Model.VolumeItem) -> bool:
+        """
+        Load the pixel data of an item listed in lazy mode or unloaded by the memory budget and create its rendering
+        nodes
+        """
+        qt.QApplication.setOverrideCursor(qt.Qt.WaitCursor)
+        try:
+            volumeNode = self.dataLoader.loadSeriesVolume(volumeItem.volumeHierarchy, volumeItem.volumeName)
+            volumeItem.setVolumeNode(volumeNode)
+        except Exception as e:
+            slicer.util.errorDisplay(f"Failed to load {volumeItem.volumeName}: {e}")
+            return False
+        finally:
+            qt.QApplication.restoreOverrideCursor()
+        return True
+
+    def loadVolumeItemDataProgressively(self, volumeItem: Model.VolumeItem):
+        """
+        Start the background load of an item listed in lazy mode or unloaded by the memory budget.
+        The item is displayed as soon as a downsampled proxy of its volume is read, and refined in place once its full
+        resolution is read.
+        """
+        itemId = id(volumeItem.volumeHierarchy)
+        if itemId in self.progressiveLoads:
+            return
+        progressiveLoad = self.dataLoader.loadVolumeProgressively(volumeItem.volumeHierarchy, volumeItem.volumeName)
+        progressiveLoad.proxyLoadedSignal.connect(
+            lambda volumeNode: self.onProgressiveProxyLoaded(volumeItem, volumeNode))
+        progressiveLoad.fullResolutionLoadedSignal.connect(
+            lambda volumeNode: self.onProgressiveFullResolutionLoaded(volumeItem, progressiveLoad.proxyVolumeData))
+        progressiveLoad.finishedSignal.connect(
+            lambda errorMessage: self.onProgressiveLoadFinished(volumeItem, errorMessage))
+        self.progressiveLoads[itemId] = progressiveLoad
+
+    def onProgressiveProxyLoaded(self, volumeItem: Model.VolumeItem, volumeNode):
+        # The item may have been deleted while its proxy was read
+        rowId = self.itemTableModel.getVolumeIdFromVolumeItem(volumeItem)
+        if rowId < 0:
+            SlicerUtils.removeNodeWithDependencies(volumeNode)
+            return
+        volumeItem.setVolumeNode(volumeNode)
+        if volumeItem is not self.pendingCurrentVolumeItem:
+            return
+        self.setCurrentVolumeItem(volumeItem)
+        self.setCurrentSelectedLineOnTableView(rowId)
+        self.updateShiftSlider(volumeItem)
+
+    def onProgressiveFullResolutionLoaded(self, volumeItem: Model.VolumeItem, proxyVolumeData):
+        if self.itemTableModel.getVolumeIdFromVolumeItem(volumeItem) < 0:
+            return
+        if volumeItem is self.interactionVolumeItem:
+            self.onViewInteractionEnded()
+        volumeItem.setFullResolutionLoaded(proxyVolumeData)
+        # The scalar range and default shift of the full resolution volume may differ from the proxy ones
+        if self.itemTableModel.getVolumeIdFromVolumeItem(volumeItem) == self.lastSelectedRowIndex:
+            self.updateShiftSlider(volumeItem)
+        self.memoryBudget.touch(volumeItem)
+        self.memoryBudget.evictIfNeeded()
+
+    def onProgressiveLoadFinished(self, volumeItem: Model.VolumeItem, errorMessage):
+        del self.progressiveLoads[id(volumeItem.volumeHierarchy)]
+        if errorMessage:
+            # Don't keep displaying the proxy of a volume which can't be fully loaded, it is read again on selection
+            volumeItem.unloadVolumeData()
+            slicer.util.errorDisplay(errorMessage)
 
     def setCurrentVolumeItem(self, volumeItem: Model.VolumeItem):
         """
-        Set the current item to the corresponding modules and toggle its visibility
-        """
-        self.renderingModule.setMRMLVolumeNode(volumeItem.volumeNode if volumeItem else None)
-        self.shiftSliderWidget.setEnabled(bool(volumeItem.volumeNode) if volumeItem else False)
-        self.segmentEditorWidget.setSegmentationNode(volumeItem.segmentationNode if volumeItem else None)
-        self.segmentEditorWidget.setSourceVolumeNode(volumeItem.volumeNode if volumeItem else None)
-        SlicerUtils.showVolumeAsForegroundInSlices(volumeItem.volumeNode.GetID() if volumeItem else None)
-        SlicerUtils.showVolumeAsBackgroundInSlices(volumeItem.volumeNode.GetID() if volumeItem else None)
-        # self.itemTableView.setCurrentIndex(self.itemTableModel.indexFromItem(item))
-        currentVolumeItemId = self.itemTableModel.getVolumeIdFromVolumeItem(volumeItem)
-        self.changeSelectedRow(currentVolumeItemId)
-        # Turn 3D visibility of volume to TRUE
-        self.itemTableModel.toggleVolumeVisibility(currentVolumeItemId)
+        Set the current item to the corresponding modules and toggle its visibility.
+        An item which is not loaded is loaded first, in the background if progressive loading is enabled.
+        """
+        if volumeItem and not volumeItem.isLoaded():
+            if SlicerLiteSettings.ProgressiveLoading:
+                self.pendingCurrentVolumeItem = volumeItem
+                self.loadVolumeItemDataProgressively(volumeItem)
+                return
+            if not self.loadVolumeItemData(volumeItem):
+                return
+        self.pendingCurrentVolumeItem = None
+
+        # All the view changes of the switch are rendered once, when the render blocker is released
+        identifier = getVolumeIdentifier(volumeItem.volumeHierarchy) if volumeItem else None
+        with getPipelineProfiler().measureStage(identifier, "setCurrentVolumeItem"), slicer.util.RenderBlocker():
+            if volumeItem:
+                self.setupRenderingModule()
+            if self.renderingModule is not None:
+                self.renderingModule.setMRMLVolumeNode(volumeItem.volumeNode if volumeItem else None)
+                self.shiftSliderWidget.setEnabled(bool(volumeItem.volumeNode) if volumeItem else False)
+            SlicerUtils.showVolumeInSlices(volumeItem.volumeNode.GetID() if volumeItem else None)
+            # self.itemTableView.setCurrentIndex(self.itemTableModel.indexFromItem(item))
+            currentVolumeItemId = self.itemTableModel.getVolumeIdFromVolumeItem(volumeItem)
+            self.changeSelectedRow(currentVolumeItemId)
+            # Turn 3D visibility of volume to TRUE
+            if currentVolumeItemId >= 0:
+                self.itemTableModel.toggleVolumeVisibility(currentVolumeItemId)
+            if not self.segmentationCollapsibleButton.collapsed:
+                self.bindSegmentEditor(volumeItem)
+
         if volumeItem:
-            self.rotateSliceViewsToSegmentation()
+            self.memoryBudget.touch(volumeItem)
+            self.memoryBudget.evictIfNeeded()
 
     def changeSelectedRow(self, selectedRowId):
         """
@@ -228,20 +570,61 @@ class SlicerLiteModuleWidget(qt.QWidget):
         Set the current item to the first one
         """
         if self.itemTableModel.rowCount() <= 0:
+            self.lastSelectedRowIndex = -1
             return
         self.setCurrentVolumeItem(self.itemTableModel.getVolumeItemFromId(0))
         self.setCurrentSelectedLineOnTableView(0)
         self.lastSelectedRowIndex = 0
 
+    def releaseVolumeItem(self, volumeItem: Model.VolumeItem) -> int:
+        """
+        Detach the item removed from the table from the views, the rendering module and the segment editor, then remove
+        all its nodes from the scene. Return the number of bytes of pixel data freed.
+        """
+        progressiveLoad = self.progressiveLoads.get(id(volumeItem.volumeHierarchy))
+        if progressiveLoad:
+            progressiveLoad.cancel()
+        if volumeItem is self.pendingCurrentVolumeItem:
+            self.pendingCurrentVolumeItem = None
+        if volumeItem is self.interactionVolumeItem:
+            self.interactionVolumeItem = None
+        if volumeItem is self.segmentEditorVolumeItem:
+            self.unbindSegmentEditor()
+        if volumeItem.getVisibility():
+            if self.renderingModule is not None:
+                self.renderingModule.setMRMLVolumeNode(None)
+            SlicerUtils.showVolumeInSlices(None)
+
+        freedBytes = volumeItem.release()
+        logging.info(f"Released {volumeItem.volumeName}: {freedBytes / 2 ** 20:.1f} MB of pixel data freed")
+        return freedBytes
+
+    def cleanup(self):
+        """
+        Release all the items and the widget nodes, and stop handling the drops on the main window
+        """
+        if self.loadJob and self.loadJob.isRunning():
+            self.loadJob.cancel()
+        volumeItems = [self.itemTableModel.getVolumeItemFromId(row) for row in range(self.itemTableModel.rowCount())]
+        self.itemTableModel.clear()
+        self.lastSelectedRowIndex = -1
+        for volumeItem in volumeItems:
+            self.releaseVolumeItem(volumeItem)
+            self.memoryBudget.volumeDeleted(volumeItem.volumeName, volumeItem.volumeHierarchy)
+        if self.segmentEditorNode:
+            slicer.mrmlScene.RemoveNode(self.segmentEditorNode)
+            self.segmentEditorNode = None
+        self.viewInteractionObserver.removeObservers()
+        if SlicerUtils.hasViews():
+            slicer.app.layoutManager().disconnect("layoutChanged(int)", self.onLayoutChanged)
+        if slicer.util.mainWindow():
+            slicer.util.mainWindow().removeEventFilter(self.filter)
+
     def setCurrentSelectedLineOnTableView(self, rowID):
         """
-        Update the display columns item on the input rowID (open and close persistent editors = buttons)
+        Update the display columns item on the input rowID (the delegates paint the buttons of the current row)
         """
-        if self.lastSelectedRowIndex >= 0:
-            self.itemTableView.closePersistentEditor(self.itemTableModel.index(self.lastSelectedRowIndex, 1))
-            self.itemTableView.closePersistentEditor(self.itemTableModel.index(self.lastSelectedRowIndex, 2))
-        self.itemTableView.openPersistentEditor(self.itemTableModel.index(rowID, 1))
-        self.itemTableView.openPersistentEditor(self.itemTableModel.index(rowID, 2))
+        self.itemTableModel.setCurrentVolumeId(rowID)
         self.lastSelectedRowIndex = rowID
 
     def onTableViewItemClicked(self, modelIndex: qt.QModelIndex):
@@ -253,31 +636,28 @@ class SlicerLiteModuleWidget(qt.QWidget):
             self.setCurrentVolumeItem(None)
             return
 
-        volumeItem = modelIndex.model().item(modelIndex.row()).data(Model.VolumeItemModel.ItemUserRole)
+        volumeItem = self.itemTableModel.getVolumeItemFromId(modelIndex.row())
         # We only want to select line if user click on volume's name
         if modelIndex.row() == self.lastSelectedRowIndex:
             return
 
-        # Save current shift rendering value
-        if self.lastSelectedRowIndex >= 0:
-            item = self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex)
-            item.shiftRenderingValue = self.shiftSliderWidget.value
-
         self.setCurrentVolumeItem(volumeItem)
+        if not volumeItem.isLoaded():
+            return
         self.setCurrentSelectedLineOnTableView(modelIndex.row())
 
         # Set current shift rendering value
         if self.lastSelectedRowIndex >= 0:
-            newItem = self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex)
-            minScalar = newItem.getMinScalarValue()
-            maxScalar = newItem.getMaxScalarValue()
-            volumeRange = maxScalar - minScalar
-            # Reduce the scalar range to 80% to avoid full white or transparent volumes
-            reducedRange = (1 - SlicerLiteSettings.DisplayScalarRange) / 2
-            newMinimum = minScalar + reducedRange * volumeRange
-            newMaximum = maxScalar - reducedRange * volumeRange
-            self.shiftSliderWidget.minimum = newMinimum
-            self.shiftSliderWidget.maximum = newMaximum
-            self.shiftSliderWidget.blockSignals(True)
-            self.shiftSliderWidget.setValue(newItem.shiftRenderingValue)
-            self.shiftSliderWidget.blockSignals(False)
+            self.updateShiftSlider(self.itemTableModel.getVolumeItemFromId(self.lastSelectedRowIndex))
+
+    def updateShiftSlider(self, volumeItem: Model.VolumeItem):
+        """
+        Set the shift slider range and value to the ones of the input current item
+        """
+        newMinimum, newMaximum = volumeItem.getShiftRenderingRange()
+        # The value clamped by the range change is not a shift of the item
+        self.shiftSliderWidget.blockSignals(True)
+        self.shiftSliderWidget.minimum = newMinimum
+        self.shiftSliderWidget.maximum = newMaximum
+        self.shiftSliderWidget.setValue(volumeItem.shiftRenderingValue)
+        self.shiftSliderWidget.blockSignals(False)
@@ -1,45 +1,182 @@
+import os
+
 import vtk
 import slicer
 
 SlicesNames = ["Red", "Yellow", "Green"]
+# Volume rendering quality and expected FPS of the 3D views, saved during interactive rendering
+_interactiveViewQualities = {}
+
 
+def getSeriesModality(seriesUID):
+    """
+    Return the DICOM modality of the series, or an empty string for the volumes which are not loaded from DICOM
+    """
+    if not seriesUID:
+        return ""
+    files = slicer.dicomDatabase.filesForSeries(seriesUID, 1)
+    return slicer.dicomDatabase.fileValue(files[0], "0008,0060") if files else ""
 
-def createRenderingPreset():
-    renderingPreset = slicer.modules.volumerendering.logic().GetPresetByName("CT-Cropped-Volume-Bone")
-    scalarOpacityString = "10 -2048 0 -451 0 -450 0 1050 0.05 3661 0.1"
-    piecewiseFunction = vtk.vtkPiecewiseFunction()
-    renderingPreset.GetPiecewiseFunctionFromString(scalarOpacityString, piecewiseFunction)
-    renderingPreset.SetScalarOpacity(piecewiseFunction)
-    return renderingPreset
+
+def hasViews():
+    """
+    Return False if Slicer runs without views, for instance with --no-main-window. The view functions then do nothing.
+    """
+    return slicer.app.layoutManager() is not None
 
 
 def resetSliceViews():
-    slicer.util.resetSliceViews()
+    if hasViews():
+        slicer.util.resetSliceViews()
+
+
+def resetThreeDViews():
+    if hasViews():
+        slicer.util.resetThreeDViews()
 
 
 def resetOriginalSlicesOrientations():
+    if not hasViews():
+        return
     for sliceName in SlicesNames:
         orientation = slicer.app.layoutManager().sliceWidget(
             sliceName).sliceLogic().GetSliceNode().GetDefaultOrientation()
         slicer.app.layoutManager().sliceWidget(sliceName).setSliceOrientation(orientation)
 
 
-def showVolumeAsForegroundInSlices(volumeID):
-    for color in SlicesNames:
-        slicer.app.layoutManager().sliceWidget(color).sliceLogic().GetSliceCompositeNode().SetForegroundVolumeID(
-            volumeID)
-
-
-def showVolumeAsBackgroundInSlices(volumeID):
+def showVolumeInSlices(volumeID):
+    """
+    Show the volume as foreground and background of the slice views, with a single modified event per slice view
+    """
+    if not hasViews():
+        return
     for color in SlicesNames:
-        slicer.app.layoutManager().sliceWidget(color).sliceLogic().GetSliceCompositeNode().SetBackgroundVolumeID(
-            volumeID)
+        compositeNode = slicer.app.layoutManager().sliceWidget(color).sliceLogic().GetSliceCompositeNode()
+        wasModified = compositeNode.StartModify()
+        compositeNode.SetForegroundVolumeID(volumeID)
+        compositeNode.SetBackgroundVolumeID(volumeID)
+        compositeNode.EndModify(wasModified)
 
 
 def addNode(nodeType):
     return slicer.mrmlScene.AddNewNodeByClass(nodeType)
 
 
+def removeNodeWithDependencies(node):
+    """
+    Remove the node from the scene with its display and storage nodes, which are not removed with it
+    """
+    if not node or not slicer.mrmlScene.IsNodePresent(node):
+        return
+    dependencies = [node.GetNthDisplayNode(i) for i in range(node.GetNumberOfDisplayNodes())]
+    dependencies += [node.GetNthStorageNode(i) for i in range(node.GetNumberOfStorageNodes())]
+    for dependency in dependencies:
+        if dependency:
+            slicer.mrmlScene.RemoveNode(dependency)
+    slicer.mrmlScene.RemoveNode(node)
+
+
+def addVolumeNodeFromVolumeData(volumeData, name):
+    """
+    Create a scalar volume node with its display nodes from a VolumeData. Must be called from the main thread.
+    The voxels are not copied: the image data points to the VolumeData array, which may be a memory mapped file.
+    """
+    volumeNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode", name)
+    updateVolumeNodeFromVolumeData(volumeNode, volumeData)
+    volumeNode.CreateDefaultDisplayNodes()
+    return volumeNode
+
+
+def updateVolumeNodeFromVolumeData(volumeNode, volumeData):
+    """
+    Replace the voxels and geometry of the volume node by the VolumeData ones, without copying the voxels
+    """
+    from vtk.util import numpy_support
+
+    array = volumeData.array
+    nbComponents = array.shape[3] if array.ndim == 4 else 1
+    # numpy_to_vtk keeps a reference to the array when not deep copying
+    vtkArray = numpy_support.numpy_to_vtk(array.reshape(-1, nbComponents), deep=False)
+    imageData = vtk.vtkImageData()
+    imageData.SetDimensions(array.shape[2], array.shape[1], array.shape[0])
+    imageData.GetPointData().SetScalars(vtkArray)
+
+    # ITK geometry is in LPS, MRML in RAS
+    lpsToRas = (-1, -1, 1)
+    directions = vtk.vtkMatrix4x4()
+    for row in range(3):
+        for column in range(3):
+            directions.SetElement(row, column, lpsToRas[row] * volumeData.direction[3 * row + column])
+
+    wasModified = volumeNode.StartModify()
+    volumeNode.SetAndObserveImageData(imageData)
+    volumeNode.SetSpacing(volumeData.spacing)
+    volumeNode.SetOrigin([lpsToRas[i] * volumeData.origin[i] for i in range(3)])
+    volumeNode.SetIJKToRASDirectionMatrix(directions)
+    volumeNode.EndModify(wasModified)
+
+
+def moveVolumeNodeImageData(sourceVolumeNode, targetVolumeNode):
+    """
+    Replace the voxels and geometry of the target volume node by the source ones, then remove the source volume node
+    """
+    ijkToRas = vtk.vtkMatrix4x4()
+    sourceVolumeNode.GetIJKToRASMatrix(ijkToRas)
+    wasModified = targetVolumeNode.StartModify()
+    targetVolumeNode.SetAndObserveImageData(sourceVolumeNode.GetImageData())
+    targetVolumeNode.SetIJKToRASMatrix(ijkToRas)
+    targetVolumeNode.EndModify(wasModified)
+    removeNodeWithDependencies(sourceVolumeNode)
+
+
+def startInteractiveVolumeRendering(expectedFPS):
+    """
+    Render the volumes of the 3D views with an adaptive quality reaching expectedFPS, until
+    endInteractiveVolumeRendering restores their rendering quality
+    """
+    for viewNode in slicer.util.getNodesByClass("vtkMRMLViewNode"):
+        if viewNode.GetID() not in _interactiveViewQualities:
+            _interactiveViewQualities[viewNode.GetID()] = (viewNode.GetVolumeRenderingQuality(),
+                                                           viewNode.GetExpectedFPS())
+        wasModified = viewNode.StartModify()
+        viewNode.SetExpectedFPS(expectedFPS)
+        viewNode.SetVolumeRenderingQuality(slicer.vtkMRMLViewNode.Adaptive)
+        viewNode.EndModify(wasModified)
+
+
+def endInteractiveVolumeRendering():
+    """
+    Restore the rendering quality of the 3D views, which are then rendered again at full quality
+    """
+    for viewNode in slicer.util.getNodesByClass("vtkMRMLViewNode"):
+        quality = _interactiveViewQualities.pop(viewNode.GetID(), None)
+        if quality is None:
+            continue
+        wasModified = viewNode.StartModify()
+        viewNode.SetVolumeRenderingQuality(quality[0])
+        viewNode.SetExpectedFPS(quality[1])
+        viewNode.EndModify(wasModified)
+
+
+def getDicomSeriesNodeName(db, seriesUID):
+    """
+    Return the node name of a DICOM series following the "<series number>: <series description>" DICOM module format
+    """
+    description = db.descriptionForSeries(seriesUID)
+    files = db.filesForSeries(seriesUID, 1)
+    seriesNumber = db.fileValue(files[0], "0020,0011") if files else ""
+    return f"{seriesNumber}: {description}" if seriesNumber else description
+
+
+def getCacheDirectory():
+    """
+    Return the directory where SlicerLite keeps its data between sessions, creating it if needed
+    """
+    cacheDirectory = os.path.join(slicer.app.cachePath, "SlicerLite")
+    os.makedirs(cacheDirectory, exist_ok=True)
+    return cacheDirectory
+
+
 def getDicomWidget():
     try:
         return slicer.modules.DICOMWidget
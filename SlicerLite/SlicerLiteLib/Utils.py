@@ -9,8 +9,16 @@ def getIconFilePath(icon):
     return os.path.join(file_dir, "..", "Resources", "Icons", icon + ".png")
 
 
+_icons = {}
+
+
 def getIcon(iconName):
-    return qt.QIcon(getIconFilePath(iconName))
+    """
+    Return the icon of the Resources/Icons directory, loaded at its first use
+    """
+    if iconName not in _icons:
+        _icons[iconName] = qt.QIcon(getIconFilePath(iconName))
+    return _icons[iconName]
 
 
 def getChildrenContainingName(widget, childString):
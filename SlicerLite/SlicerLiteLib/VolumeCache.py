@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+def getForegroundBox(array, thresholdFraction, maxDimension=128):
+    """
+    Return the (i, j, k) start and end indices of the box enclosing the foreground voxels of a (k, j, i) or
+    (k, j, i, components) array, or None if the array has no foreground.
+    The foreground voxels are the ones above the threshold set at thresholdFraction between the 0.5 and 99.5
+    percentiles of the voxel values. The box is computed on the array downsampled to maxDimension and enlarged by one
+    stride, so that it is cheap enough to be computed on the main thread.
+    """
+    strides = [max(1, -(-dimension // maxDimension)) for dimension in array.shape[2::-1]]
+    downsampled = array[::strides[2], ::strides[1], ::strides[0]]
+    if downsampled.ndim == 4:
+        downsampled = downsampled.max(axis=3)
+    low, high = np.percentile(downsampled, (0.5, 99.5))
+    if high <= low:
+        return None
+    mask = downsampled > low + thresholdFraction * (high - low)
+
+    # Project the mask on each (k, j, i) axis
+    startKJI, endKJI = [], []
+    for axis in range(3):
+        indices = np.flatnonzero(mask.any(axis=tuple(otherAxis for otherAxis in range(3) if otherAxis != axis)))
+        if len(indices) == 0:
+            return None
+        startKJI.append(indices[0])
+        endKJI.append(indices[-1] + 1)
+
+    shape = array.shape[2::-1]
+    start = tuple(int(max(0, (startKJI[2 - n] - 1) * strides[n])) for n in range(3))
+    end = tuple(int(min(shape[n], (endKJI[2 - n] + 1) * strides[n])) for n in range(3))
+    return start, end
+
+
+@dataclass
+class VolumeData:
+    """
+    Decoded voxels of a volume with their geometry in the ITK (LPS) convention
+    """
+    # Voxels ordered as (k, j, i) or (k, j, i, components)
+    array: np.ndarray
+    spacing: tuple
+    origin: tuple
+    # Row major 3x3 direction matrix
+    direction: tuple
+
+    @staticmethod
+    def fromImage(image):
+        """
+        Create the VolumeData of a 2D or 3D SimpleITK image
+        """
+        import SimpleITK as sitk
+
+        if image.GetDimension() == 2:
+            image = sitk.JoinSeries(image)
+        return VolumeData(sitk.GetArrayFromImage(image), image.GetSpacing(), image.GetOrigin(), image.GetDirection())
+
+    def getVoxelCount(self):
+        return int(np.prod(self.array.shape[:3]))
+
+    def getDownsampled(self, strides):
+        """
+        Return a copy of the volume keeping one voxel every (i, j, k) strides, with the same origin and direction
+        """
+        strideI, strideJ, strideK = strides
+        array = np.ascontiguousarray(self.array[::strideK, ::strideJ, ::strideI])
+        spacing = tuple(s * stride for s, stride in zip(self.spacing, strides))
+        return VolumeData(array, spacing, self.origin, self.direction)
+
+    def getCropped(self, start, end):
+        """
+        Return a copy of the volume restricted to the (i, j, k) start and end indices, at the same physical position
+        """
+        (startI, startJ, startK), (endI, endJ, endK) = start, end
+        array = np.ascontiguousarray(self.array[startK:endK, startJ:endJ, startI:endI])
+        direction = np.array(self.direction).reshape(3, 3)
+        origin = np.array(self.origin) + direction @ (np.array(start) * np.array(self.spacing))
+        return VolumeData(array, self.spacing, tuple(origin.tolist()), self.direction)
+
+    def getProxyStrides(self, maxDimension):
+        """
+        Return the (i, j, k) strides for which no dimension of the downsampled volume exceeds maxDimension
+        """
+        return tuple(max(1, -(-dimension // maxDimension)) for dimension in self.array.shape[2::-1])
+
+
+class DecodedVolumeCache:
+    """
+    Disk cache of decoded volumes, to re-open a volume without decoding its source files again.
+
+    Each volume is stored as raw little-endian voxels next to a JSON file holding its geometry. Cached voxels are
+    memory mapped when loaded, so they are only read from disk when accessed. The least recently used volumes are
+    removed when the cache exceeds its quota. Can be used from worker threads.
+    """
+
+    def __init__(self, cacheDirectory: str, quotaBytes: int):
+        self.cacheDirectory = cacheDirectory
+        self.quotaBytes = quotaBytes
+        self._lock = threading.Lock()
+        os.makedirs(cacheDirectory, exist_ok=True)
+
+    @staticmethod
+    def getKey(identifier: str, filePaths) -> Optional[str]:
+        """
+        Return the cache key of a volume from its identifier (series UID or file path) and the size and modification
+        time of its source files, so that modified sources are decoded again. Return None if a file is missing.
+        """
+        signature = hashlib.sha1(identifier.encode())
+        for filePath in sorted(filePaths):
+            try:
+                fileStat = os.stat(filePath)
+            except OSError:
+                return None
+            signature.update(f"{filePath}:{fileStat.st_size}:{fileStat.st_mtime_ns}".encode())
+        return signature.hexdigest()
+
+    def _getPaths(self, key):
+        return os.path.join(self.cacheDirectory, key + ".raw"), os.path.join(self.cacheDirectory, key + ".json")
+
+    def load(self, key: str) -> Optional[VolumeData]:
+        """
+        Return the memory mapped VolumeData of the key, or None if it is not cached
+        """
+        rawPath, metadataPath = self._getPaths(key)
+        try:
+            with open(metadataPath) as metadataFile:
+                metadata = json.load(metadataFile)
+            # Copy on write mapping: the cached file is never modified by the scene
+            array = np.memmap(rawPath, dtype=np.dtype(metadata["dtype"]), mode="c", shape=tuple(metadata["shape"]))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Access time is kept on the metadata file for the LRU eviction
+        try:
+            os.utime(metadataPath)
+        except OSError:
+            pass
+        return VolumeData(array, tuple(metadata["spacing"]), tuple(metadata["origin"]), tuple(metadata["direction"]))
+
+    def store(self, key: str, volumeData: VolumeData):
+        """
+        Write the volume in the cache and evict the least recently used volumes exceeding the quota
+        """
+        array = np.ascontiguousarray(volumeData.array)
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        if array.nbytes > self.quotaBytes:
+            return
+
+        rawPath, metadataPath = self._getPaths(key)
+        metadata = {
+            "dtype": array.dtype.str,
+            "shape": array.shape,
+            "spacing": volumeData.spacing,
+            "origin": volumeData.origin,
+            "direction": volumeData.direction,
+        }
+        # Written under temporary names so that a concurrent load never sees a partial volume
+        array.tofile(rawPath + ".tmp")
+        with open(metadataPath + ".tmp", "w") as metadataFile:
+            json.dump(metadata, metadataFile)
+        os.replace(rawPath + ".tmp", rawPath)
+        os.replace(metadataPath + ".tmp", metadataPath)
+        self.evict()
+
+    def getEntries(self):
+        """
+        Return the (access time, size in bytes, key) of the cached volumes
+        """
+        entries = []
+        for fileName in os.listdir(self.cacheDirectory):
+            if not fileName.endswith(".json"):
+                continue
+            key = fileName[:-len(".json")]
+            rawPath, metadataPath = self._getPaths(key)
+            try:
+                entries.append((os.stat(metadataPath).st_mtime, os.stat(rawPath).st_size, key))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used volumes until the cache fits in its quota
+        """
+        with self._lock:
+            entries = sorted(self.getEntries())
+            cacheSize = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if cacheSize <= self.quotaBytes:
+                    break
+                for path in self._getPaths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        # Still mapped on platforms which forbid removing opened files, retried on next eviction
+                        pass
+                cacheSize -= size
@@ -1,9 +1,15 @@
 from .Settings import *
+from .Instrumentation import *
 from .EventFilters import *
 from .SlicerUtils import *
+from .DicomIndexCache import *
+from .VolumeCache import *
+from .RenderingPresets import *
 from .DataLoader import *
 from .UIUtils import *
 from .Utils import *
+from .DicomMetadata import *
 from .Delegates import *
 from .Model import *
+from .MemoryBudget import *
 from .SlicerLiteModuleWidget import *
\ No newline at end of file